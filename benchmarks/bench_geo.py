@@ -0,0 +1,56 @@
+"""Payload size and build time of binned map cells against the number of venues.
+
+Run with `python -m benchmarks.bench_geo`.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+import src.geo as geo
+
+
+def make_map_df(n_venues: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "location": [f"venue{i}" for i in range(n_venues)],
+            "count": rng.integers(1, 50, n_venues),
+            "latitude": rng.normal(35.68, 0.3, n_venues),
+            "longitude": rng.normal(139.74, 0.3, n_venues),
+            "full_address": [f"address {i}" for i in range(n_venues)],
+        }
+    )
+
+
+def main() -> None:
+    print(
+        f"{'venues':>8} {'raw KB':>9} {'cells':>7} {'binned KB':>10} "
+        f"{'build ms':>9} {'zoom ms':>8}"
+    )
+    for n_venues in [100, 1_000, 10_000, 100_000]:
+        map_df = make_map_df(n_venues)
+        raw_json = geo.get_map_layer(map_df, "scatter").to_json()
+
+        start = time.perf_counter()
+        pyramid = geo.build_grid_pyramid(map_df)
+        cells = geo.get_map_cells(map_df, pyramid, geo.DEFAULT_ZOOM)
+        elapsed = time.perf_counter() - start
+        binned_json = geo.get_map_layer(cells, "scatter").to_json()
+
+        # A zoom change on the same range reuses the cached pyramid.
+        geo.get_grid_pyramid(map_df)
+        start = time.perf_counter()
+        geo.get_map_cells(map_df, geo.get_grid_pyramid(map_df), geo.DEFAULT_ZOOM + 2)
+        zoom_elapsed = time.perf_counter() - start
+
+        print(
+            f"{n_venues:>8} {len(raw_json) / 1024:>9.1f} {len(cells):>7} "
+            f"{len(binned_json) / 1024:>10.1f} {elapsed * 1000:>9.1f} "
+            f"{zoom_elapsed * 1000:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
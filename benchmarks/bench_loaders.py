@@ -0,0 +1,63 @@
+"""Compare per-sheet worksheet fetches with the batched loader on a fake client.
+
+Run with `python -m benchmarks.bench_loaders`.
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import src.snapshots as snapshots
+from src.fake_gspread import FakeClient
+from src.synthetic import make_dataset, to_sheet_values
+
+URL = "https://docs.google.com/spreadsheets/d/fake-bench/edit"
+SHEET_NUMS = [0, 1, 3]
+
+
+def make_sheets(n_rows: int) -> dict[str, list]:
+    cheki_df, person_df, venue_df = make_dataset(n_rows)
+    return {
+        "cheki": to_sheet_values(cheki_df),
+        "person": to_sheet_values(person_df),
+        "unused": [],
+        "venue": to_sheet_values(venue_df),
+    }
+
+
+def per_sheet_fetch(gc: FakeClient) -> None:
+    for sheet_num in SHEET_NUMS:
+        gc.open_by_url(URL).get_worksheet(sheet_num).get_all_values()
+
+
+def batched_fetch(gc: FakeClient) -> None:
+    snapshots.sync_worksheet_grids(gc, URL, SHEET_NUMS)  # type: ignore[arg-type]
+
+
+def run(name: str, fetch, n_rows: int, latency: float) -> None:
+    gc = FakeClient(make_sheets(n_rows), latency=latency)
+    start = time.perf_counter()
+    fetch(gc)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<24} {elapsed * 1000:8.1f} ms  {gc.requests:3d} requests")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--latency", type=float, default=0.15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        snapshots.SNAPSHOT_DIR = Path(snapshot_dir)
+        run("per-sheet", per_sheet_fetch, args.rows, args.latency)
+        run("batched (cold)", batched_fetch, args.rows, args.latency)
+
+        gc = FakeClient(make_sheets(args.rows), latency=args.latency)
+        batched_fetch(gc)
+        run("batched (warm snapshot)", batched_fetch, args.rows, args.latency)
+
+
+if __name__ == "__main__":
+    main()
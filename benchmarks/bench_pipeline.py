@@ -0,0 +1,196 @@
+"""Timings and peak memory of the data pipeline on synthetic collections.
+
+Run with `python -m benchmarks.bench_pipeline`. `--save-baseline` records the
+results; later runs compare against that file and exit non-zero when a case
+is slower or uses more memory than the baseline by more than `--threshold`.
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable
+
+import src.aggregates as aggregates
+import src.compute as compute
+import src.cube as cube
+import src.incremental as incremental
+import src.munge as munge
+import src.search as search
+import src.sql_backend as sql_backend
+from src.pipeline import ChekiData, process_cheki_data
+from src.synthetic import make_dataset
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+
+def get_cases(n_rows: int) -> dict[str, Callable[[], Any]]:
+    cheki_df, person_df, venue_df = make_dataset(n_rows)
+    # State of the sheet before its last 1% of rows were appended.
+    process_cheki_data(
+        cheki_df.iloc[: n_rows - n_rows // 100].copy(),
+        person_df.copy(),
+        venue_df.copy(),
+    )
+    appended_state = incremental.get_state()
+    data = process_cheki_data(cheki_df.copy(), person_df.copy(), venue_df.copy())
+    first_date, last_date = date(2018, 1, 1), date(2025, 12, 31)
+    records_df = cube.get_records_df(
+        data.count_cube, data.person_df, first_date, last_date
+    )
+    cutoff = int(records_df["total"].median())
+    top_persons = list(records_df["name"].head(5))
+    database = sql_backend.build_database(
+        data.cheki_df, data.names_df, data.venue_table
+    )
+
+    def process_appended_rows() -> ChekiData:
+        incremental.set_state(appended_state)
+        return process_cheki_data(
+            cheki_df.copy(), person_df.copy(), venue_df.copy(), use_previous=True
+        )
+
+    cases = {
+        "process_cheki_data": lambda: process_cheki_data(
+            cheki_df.copy(), person_df.copy(), venue_df.copy()
+        ),
+        "process_cheki_data[append]": process_appended_rows,
+        "group_cheki_by_name": lambda: munge.group_cheki_by_name(data.cheki_df),
+        "munge.get_records_df": lambda: munge.get_records_df(
+            data.names_df, data.person_df, ["name"]
+        ),
+        "munge.get_records_df[date]": lambda: munge.get_records_df(
+            data.names_df, data.person_df, ["date", "name"], 2
+        ),
+        "cube.get_records_df": lambda: cube.get_records_df(
+            data.count_cube, data.person_df, first_date, last_date
+        ),
+        "cube.get_records_df[date]": lambda: cube.get_records_df(
+            data.count_cube, data.person_df, first_date, last_date, True
+        ),
+        "get_cutoff_data": lambda: munge.get_cutoff_data(records_df, cutoff),
+        "limit_to_selected_persons": lambda: compute.limit_to_selected_persons(
+            top_persons, data.cheki_df, data.person_index
+        ),
+        "build_name_index": lambda: search.build_name_index(
+            data.person_df, data.person_index
+        ),
+        "search_names[prefix]": lambda: search.search_names(
+            data.name_index, top_persons[0][:2]
+        ),
+        "search_names[fuzzy]": lambda: search.search_names(
+            data.name_index, top_persons[0][::-1]
+        ),
+        "get_cheki_page[sorted]": lambda: compute.get_cheki_page(
+            data, data.cheki_df, 1_000, 100, "municipality", False
+        ),
+        "get_cheki_chart_data": lambda: compute.get_cheki_chart_data(data.cheki_df),
+        "get_cheki_map_data": lambda: compute.get_cheki_map_data(
+            data.cheki_df, data.venue_table
+        ),
+        "aggregates.get_time_series[week]": lambda: aggregates.get_time_series(
+            data.aggregates.daily_counts, first_date, last_date, "W-MON"
+        ),
+    }
+    if database is not None:
+        cases |= {
+            "sql.get_records_df": lambda: sql_backend.get_records_df(
+                database, data.person_df, first_date, last_date
+            ),
+            "sql.get_records_df[date]": lambda: sql_backend.get_records_df(
+                database, data.person_df, first_date, last_date, True
+            ),
+            "sql.get_cheki_chart_data": lambda: sql_backend.get_cheki_chart_data(
+                database, first_date, last_date, []
+            ),
+            "sql.get_cheki_map_data": lambda: sql_backend.get_cheki_map_data(
+                database, first_date, last_date, top_persons
+            ),
+        }
+    return cases
+
+
+def measure(func: Callable[[], Any], repeat: int) -> dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    # Peak memory is taken on a separate run so tracing doesn't skew timings.
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": min(timings), "peak_bytes": peak}
+
+
+def run(sizes: list[int], repeat: int) -> dict[str, dict[str, float]]:
+    results = {}
+    for n_rows in sizes:
+        for name, func in get_cases(n_rows).items():
+            key = f"{name}@{n_rows}"
+            results[key] = measure(func, repeat)
+            print(
+                f"{key:<40} {results[key]['seconds'] * 1000:>10.2f} ms "
+                f"{results[key]['peak_bytes'] / 2**20:>9.2f} MiB"
+            )
+    return results
+
+
+def get_regressions(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    threshold: float,
+) -> list[str]:
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        for metric in ["seconds", "peak_bytes"]:
+            limit = baseline[key][metric] * (1 + threshold)
+            if result[metric] > limit:
+                regressions.append(
+                    f"{key} {metric}: {result[metric]:.4g} > {limit:.4g} "
+                    f"(baseline {baseline[key][metric]:.4g})"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    # Databases built here stay out of the directory a running app uses.
+    with tempfile.TemporaryDirectory() as database_dir:
+        sql_backend.DATABASE_DIR = Path(database_dir)
+        results = run(args.sizes, args.repeat)
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print("No baseline found; run with --save-baseline first.")
+        return 0
+
+    regressions = get_regressions(
+        results, json.loads(args.baseline.read_text()), args.threshold
+    )
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
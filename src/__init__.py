@@ -0,0 +1,7 @@
+import pandas as pd
+
+# Copy-on-write for everything under src: frames derived from the loaded and
+# cached ones share their memory until written to, so the pipeline never has
+# to copy defensively, and a write can never reach a frame another session
+# (or the incremental state) holds.
+pd.set_option("mode.copy_on_write", True)
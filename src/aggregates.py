@@ -0,0 +1,138 @@
+from dataclasses import dataclass
+from datetime import date
+
+import pandas as pd
+
+from src.munge import get_date_slice
+
+# Counts that every refresh needs, kept in long form so appended or edited
+# rows can be added to (and removed from) them without regrouping the whole
+# collection:
+#   name_counts      (date, name, n_shown) -> exploded rows
+#   daily_counts     day -> cheki rows
+#   location_counts  (day, location) -> cheki rows
+#   person_daily_counts  (day, name) -> cheki showing that name
+# The daily counts double as a rollup store: week, month, quarter and year
+# series are resampled from them instead of from the cheki rows.
+
+GRANULARITIES = {
+    "Day": "D",
+    "Week": "W-MON",
+    "Month": "MS",
+    "Quarter": "QS",
+    "Year": "YS",
+}
+
+PLAIN_KEYS = {"name": object, "location": object, "n_shown": "int64"}
+
+
+@dataclass
+class Aggregates:
+    name_counts: pd.Series
+    daily_counts: pd.Series
+    location_counts: pd.Series
+    person_daily_counts: pd.Series
+
+
+def with_plain_keys(counts: pd.Series) -> pd.Series:
+    # Grouping runs on the categorical codes; only the (much smaller) counts
+    # get plain keys, so deltas align regardless of categories.
+    levels = [
+        level.astype(PLAIN_KEYS[level.name]) if level.name in PLAIN_KEYS else level
+        for level in counts.index.levels
+    ]
+    return counts.set_axis(counts.index.set_levels(levels))
+
+
+def get_aggregates(cheki_df: pd.DataFrame, names_df: pd.DataFrame) -> Aggregates:
+    days = cheki_df["date"].dt.normalize().rename("date")
+    # A name listed twice on one cheki still counts that cheki once.
+    person_days = names_df[["cheki_id", "date", "name"]].drop_duplicates(
+        ["cheki_id", "name"]
+    )
+    return Aggregates(
+        name_counts=with_plain_keys(
+            names_df.groupby(["date", "name", "n_shown"], observed=True).size()
+        ),
+        daily_counts=cheki_df.groupby(days).size(),
+        location_counts=with_plain_keys(
+            cheki_df.groupby([days, cheki_df["location"]], observed=True).size()
+        ),
+        person_daily_counts=with_plain_keys(
+            person_days.groupby(
+                [pd.to_datetime(person_days["date"]), person_days["name"]],
+                observed=True,
+            ).size()
+        ),
+    )
+
+
+def combine_counts(old: pd.Series, added: pd.Series, removed: pd.Series) -> pd.Series:
+    combined = old.add(added, fill_value=0).sub(removed, fill_value=0)
+    return combined[combined > 0].astype("int64")
+
+
+def apply_delta(
+    aggregates: Aggregates, added: Aggregates, removed: Aggregates
+) -> Aggregates:
+    return Aggregates(
+        name_counts=combine_counts(
+            aggregates.name_counts, added.name_counts, removed.name_counts
+        ),
+        daily_counts=combine_counts(
+            aggregates.daily_counts, added.daily_counts, removed.daily_counts
+        ),
+        location_counts=combine_counts(
+            aggregates.location_counts, added.location_counts, removed.location_counts
+        ),
+        person_daily_counts=combine_counts(
+            aggregates.person_daily_counts,
+            added.person_daily_counts,
+            removed.person_daily_counts,
+        ),
+    )
+
+
+def get_bucket_grouper(freq: str, key: str | None = None) -> pd.Grouper:
+    # Buckets are labelled by their first day, weeks starting on Monday.
+    return pd.Grouper(key=key, freq=freq, label="left", closed="left")
+
+
+def to_time_series(daily: pd.Series, freq: str) -> pd.DataFrame:
+    series = daily.groupby(get_bucket_grouper(freq)).sum()
+    return series.rename_axis("datetime").to_frame("count")
+
+
+# Same results as compute.get_cheki_chart_data and compute.get_cheki_map_data
+# over the date-ranged cheki frame, read from the stored counts instead.
+def get_time_series(
+    daily_counts: pd.Series, first_date: date, last_date: date, freq: str = "MS"
+) -> pd.DataFrame:
+    days = daily_counts.iloc[get_date_slice(daily_counts.index, first_date, last_date)]
+    return to_time_series(days, freq)
+
+
+def get_person_time_series(
+    person_daily_counts: pd.Series,
+    name: str,
+    first_date: date,
+    last_date: date,
+    freq: str = "MS",
+) -> pd.DataFrame:
+    dates = person_daily_counts.index.get_level_values("date")
+    days = person_daily_counts.iloc[get_date_slice(dates, first_date, last_date)]
+    days = days[days.index.get_level_values("name") == name].droplevel("name")
+    return to_time_series(days, freq)
+
+
+def get_location_counts(
+    location_counts: pd.Series,
+    venue_table: pd.DataFrame,
+    first_date: date,
+    last_date: date,
+) -> pd.DataFrame:
+    dates = location_counts.index.get_level_values("date")
+    counts = location_counts.iloc[get_date_slice(dates, first_date, last_date)]
+    counts = counts.groupby(level="location").sum()
+    cheki_map_df = counts.to_frame("count").join(venue_table, how="inner")
+    return cheki_map_df.rename_axis("location").reset_index()
@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import sys
+from datetime import date
+from typing import Callable
+
+import src.compute as compute
+from src.aggregates import GRANULARITIES
+from src.data_service import DataService
+from src.pipeline import ChekiData, load_cheki_data, process_cheki_data
+from src.server import DEFAULT_HOST, DEFAULT_PORT, serve
+from src.sheets import get_service_account_client
+from src.synthetic import make_dataset
+
+# The dashboard's aggregations from the command line, e.g.
+#   python -m src.cli top --from 2023-01-01 --top-n 10
+#   python -m src.cli series --person A --granularity Week
+#   python -m src.cli serve --port 8502
+# Without --credentials the sheet is read from the local snapshots.
+
+
+def get_loader(args: argparse.Namespace) -> Callable[[], ChekiData]:
+    if args.synthetic:
+        return lambda: process_cheki_data(*make_dataset(args.synthetic))
+    gc = get_service_account_client(args.credentials) if args.credentials else None
+    return lambda: load_cheki_data(gc, args.url)
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src.cli")
+    parser.add_argument("--url", default=os.environ.get("CHEKILYTICS_SHEET_URL"))
+    parser.add_argument("--credentials", help="service account JSON file")
+    parser.add_argument(
+        "--synthetic", type=int, metavar="ROWS", help="use a generated dataset"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for query in compute.QUERIES:
+        command = commands.add_parser(query)
+        command.add_argument("--from", dest="first_date", type=date.fromisoformat)
+        command.add_argument("--to", dest="last_date", type=date.fromisoformat)
+        command.add_argument("--person", action="append", default=[])
+        command.add_argument("--top-n", type=int, default=compute.DEFAULT_TOP_N)
+        command.add_argument(
+            "--granularity", choices=list(GRANULARITIES), default="Month"
+        )
+
+    command = commands.add_parser("serve")
+    command.add_argument("--host", default=DEFAULT_HOST)
+    command.add_argument("--port", type=int, default=DEFAULT_PORT)
+    return parser
+
+
+def main() -> int:
+    parser = get_parser()
+    args = parser.parse_args()
+    if not args.synthetic and not args.url:
+        parser.error("--url (or CHEKILYTICS_SHEET_URL) or --synthetic is required")
+    load = get_loader(args)
+
+    if args.command == "serve":
+        serve(DataService(load), args.host, args.port)
+        return 0
+
+    df = compute.run_query(
+        load(),
+        args.command,
+        first_date=args.first_date,
+        last_date=args.last_date,
+        persons=args.person,
+        top_n=args.top_n,
+        granularity=args.granularity,
+    )
+    json.dump(compute.to_records(df), sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+import json
+from datetime import date
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+import src.aggregates as aggregates
+import src.cube as cube
+import src.munge as munge
+import src.sql_backend as sql_backend
+from src.instrumentation import span
+from src.pipeline import ChekiData
+from src.search import get_cheki_ids, get_spellings
+
+# The dashboard's aggregations for a date range and a set of persons, without
+# Streamlit, so the tabs, the CLI and the JSON service all share them. Each
+# answer comes from the cheapest store that can give it exactly: the stored
+# counts, the SQL backend when enabled, or the date-ranged cheki rows.
+# Selected persons are first resolved, through the name index, to every way
+# their names are written on the cheki sheet.
+
+IMAGE_COLUMN = "uri"
+
+
+def get_cheki_chart_data(df: pd.DataFrame, freq: str = "MS") -> pd.DataFrame:
+    # The date column is parsed once per load, so this groups without a copy.
+    grouper = aggregates.get_bucket_grouper(freq, key="date")
+    counts = df.groupby(grouper).size()
+    return counts.rename_axis("datetime").to_frame("count")
+
+
+def limit_to_selected_persons(
+    selected_persons: list[str],
+    df: pd.DataFrame,
+    person_index: dict[str, np.ndarray],
+) -> pd.DataFrame:
+    cheki_ids = get_cheki_ids(person_index, selected_persons)
+    dated_cheki_df = df[df.index.isin(cheki_ids)]
+    if dated_cheki_df.empty:
+        # Every column of an empty frame is "empty"; keep them for the callers.
+        return dated_cheki_df
+
+    empty_cols = dated_cheki_df.isna().all()
+    # The cheki frame is already date-sorted, and isin keeps that order.
+    return dated_cheki_df.loc[:, ~empty_cols]
+
+
+def get_cheki_map_data(df: pd.DataFrame, venue_table: pd.DataFrame) -> pd.DataFrame:
+    grouped = df.groupby("location", observed=True)["date"].count()
+    grouped.index = grouped.index.astype(object)
+    cheki_map_df = grouped.to_frame("count").join(venue_table, how="inner")
+    return cheki_map_df.rename_axis("location").reset_index()
+
+
+def get_date_bounds(data: ChekiData) -> tuple[date, date]:
+    # The default range: the first dated cheki up to today.
+    earliest_date = data.names_df["date"].dropna().min()
+    today = date.today()
+    if pd.isna(earliest_date):
+        return today, today
+    return earliest_date, today
+
+
+def get_cheki_rows(
+    data: ChekiData, first_date: date, last_date: date, persons: list[str]
+) -> pd.DataFrame:
+    persons = get_spellings(data.name_index, persons)
+    with span("slice_date_range", rows_in=len(data.cheki_df)) as s:
+        df = munge.slice_date_range(data.cheki_df, first_date, last_date)
+        s.rows_out = len(df)
+    if persons:
+        with span("limit_to_selected_persons", rows_in=len(df)) as s:
+            df = limit_to_selected_persons(persons, df, data.person_index)
+            s.rows_out = len(df)
+    return df
+
+
+def get_gallery_rows(
+    data: ChekiData, first_date: date, last_date: date, persons: list[str]
+) -> pd.DataFrame:
+    # Cheki with a picture: the sheet's optional IMAGE_COLUMN holds its URI.
+    df = get_cheki_rows(data, first_date, last_date, persons)
+    if IMAGE_COLUMN not in df.columns:
+        return df.iloc[:0]
+    return df[df[IMAGE_COLUMN].notna()]
+
+
+def get_name_totals(
+    data: ChekiData,
+    first_date: date,
+    last_date: date,
+    persons: list[str],
+    group_by_date: bool = False,
+) -> pd.DataFrame:
+    persons = get_spellings(data.name_index, persons)
+    with span("get_records_df", rows_in=len(data.count_cube)) as s:
+        if data.analytics_db is not None:
+            name_df = sql_backend.get_records_df(
+                data.analytics_db,
+                person_df=data.person_df,
+                first_date=first_date,
+                last_date=last_date,
+                group_by_date=group_by_date,
+            )
+        else:
+            name_df = cube.get_records_df(
+                cube=data.count_cube,
+                person_df=data.person_df,
+                first_date=first_date,
+                last_date=last_date,
+                group_by_date=group_by_date,
+            )
+        s.rows_out = len(name_df)
+    if persons:
+        name_df = name_df[name_df["name"].isin(persons)]
+    return name_df
+
+
+def get_top_names(
+    data: ChekiData,
+    first_date: date,
+    last_date: date,
+    persons: list[str],
+    top_n: int,
+) -> pd.DataFrame:
+    name_df = get_name_totals(data, first_date, last_date, persons)
+    return munge.get_top_n_data(name_df, top_n)
+
+
+def get_time_series(
+    data: ChekiData,
+    first_date: date,
+    last_date: date,
+    persons: list[str],
+    freq: str = "MS",
+) -> pd.DataFrame:
+    persons = get_spellings(data.name_index, persons)
+    with span("get_cheki_chart_data") as s:
+        if not persons:
+            chart_data = aggregates.get_time_series(
+                data.aggregates.daily_counts, first_date, last_date, freq
+            )
+        elif len(persons) == 1:
+            chart_data = aggregates.get_person_time_series(
+                data.aggregates.person_daily_counts,
+                persons[0],
+                first_date,
+                last_date,
+                freq,
+            )
+        elif data.analytics_db is not None:
+            chart_data = sql_backend.get_cheki_chart_data(
+                data.analytics_db, first_date, last_date, persons, freq
+            )
+        else:
+            rows = get_cheki_rows(data, first_date, last_date, persons)
+            chart_data = get_cheki_chart_data(rows, freq)
+        s.rows_out = len(chart_data)
+    return chart_data
+
+
+def get_venue_counts(
+    data: ChekiData, first_date: date, last_date: date, persons: list[str]
+) -> pd.DataFrame:
+    persons = get_spellings(data.name_index, persons)
+    with span("get_cheki_map_data") as s:
+        if not persons:
+            cheki_map_df = aggregates.get_location_counts(
+                data.aggregates.location_counts,
+                data.venue_table,
+                first_date,
+                last_date,
+            )
+        elif data.analytics_db is not None:
+            cheki_map_df = sql_backend.get_cheki_map_data(
+                data.analytics_db, first_date, last_date, persons
+            )
+        else:
+            rows = get_cheki_rows(data, first_date, last_date, persons)
+            cheki_map_df = get_cheki_map_data(rows, data.venue_table)
+        s.rows_out = len(cheki_map_df)
+    return cheki_map_df
+
+
+def get_page_rows(
+    df: pd.DataFrame,
+    start: int,
+    size: int,
+    sort_keys: pd.Series | None = None,
+    ascending: bool = True,
+) -> pd.DataFrame:
+    # One window of rows. Only the sort keys are ordered; the rest of the
+    # frame is neither reordered nor copied.
+    if sort_keys is None:
+        return df.iloc[start : start + size]
+    order = (
+        sort_keys.reset_index(drop=True)
+        .sort_values(ascending=ascending, kind="stable", na_position="last")
+        .index
+    )
+    return df.iloc[order[start : start + size]]
+
+
+def get_page(
+    df: pd.DataFrame,
+    start: int,
+    size: int,
+    sort_by: str | None = None,
+    ascending: bool = True,
+    columns: list[str] | None = None,
+) -> pd.DataFrame:
+    sort_keys = None if sort_by is None else df[sort_by]
+    rows = get_page_rows(df, start, size, sort_keys, ascending)
+    return rows if columns is None else rows[columns]
+
+
+def get_cheki_page(
+    data: ChekiData,
+    df: pd.DataFrame,
+    start: int,
+    size: int,
+    sort_by: str | None = None,
+    ascending: bool = True,
+    columns: list[str] | None = None,
+) -> pd.DataFrame:
+    # Venue columns are merged onto the page alone; sorting by one of them
+    # looks it up per location instead of merging the whole range first.
+    venues = data.venue_df.drop_duplicates("location").set_index("location")
+    if sort_by in venues.columns:
+        # Venues are ranked once per location and rows sorted by that rank;
+        # code -1 (no location) picks the trailing NaN.
+        locations = df["location"].astype("category").cat
+        values = venues[sort_by].reindex(locations.categories)
+        ranks = values.rank(method="dense").to_numpy()
+        sort_keys = pd.Series(np.append(ranks, np.nan)[locations.codes])
+    else:
+        sort_keys = None if sort_by is None else df[sort_by]
+    rows = get_page_rows(df, start, size, sort_keys, ascending)
+    with span("merge_venues", rows_in=len(rows)) as s:
+        page = pd.merge(rows, data.venue_df, how="left", on="location")
+        s.rows_out = len(page)
+    return page if columns is None else page[columns]
+
+
+def get_cheki_columns(data: ChekiData, df: pd.DataFrame) -> list[str]:
+    venue_columns = [col for col in data.venue_df.columns if col != "location"]
+    return list(df.columns) + venue_columns
+
+
+def to_records(df: pd.DataFrame) -> list[dict[str, Any]]:
+    # JSON-ready rows; a datetime index (time series) becomes a column.
+    if isinstance(df.index, pd.DatetimeIndex):
+        df = df.reset_index()
+    return json.loads(
+        df.to_json(orient="records", date_format="iso", force_ascii=False)
+    )
+
+
+QUERIES = ["names", "top", "series", "venues"]
+DEFAULT_TOP_N = 20
+
+
+def run_query(
+    data: ChekiData,
+    query: str,
+    first_date: date | None = None,
+    last_date: date | None = None,
+    persons: list[str] | None = None,
+    top_n: int = DEFAULT_TOP_N,
+    granularity: str = "Month",
+) -> pd.DataFrame:
+    # Entry point for the CLI and the JSON service; dates default to the
+    # dashboard's default range.
+    default_first, default_last = get_date_bounds(data)
+    first_date = first_date or default_first
+    last_date = last_date or default_last
+    persons = persons or []
+    if granularity not in aggregates.GRANULARITIES:
+        raise ValueError(
+            f"Unknown granularity {granularity!r}; "
+            f"expected one of {list(aggregates.GRANULARITIES)}"
+        )
+
+    if query == "names":
+        return get_name_totals(data, first_date, last_date, persons)
+    if query == "top":
+        return get_top_names(data, first_date, last_date, persons, top_n)
+    if query == "series":
+        freq = aggregates.GRANULARITIES[granularity]
+        return get_time_series(data, first_date, last_date, persons, freq)
+    if query == "venues":
+        return get_venue_counts(data, first_date, last_date, persons)
+    raise ValueError(f"Unknown query {query!r}; expected one of {QUERIES}")
@@ -1,14 +1,35 @@
+import os
+
 import gspread
 import streamlit as st
 from google.oauth2 import service_account
 
+from src.sheets import SCOPES
+
+
+def is_offline() -> bool:
+    # Offline mode serves worksheets from local snapshots only.
+    if os.environ.get("CHEKILYTICS_OFFLINE", "").lower() in ("1", "true", "yes"):
+        return True
+    try:
+        return bool(st.secrets.get("offline", False))
+    except FileNotFoundError:
+        return False
 
+
+# Created on first use and shared by every session and rerun, so credentials
+# are parsed once and the authorized HTTP session keeps its connection pool.
+@st.cache_resource
 def get_google_conn() -> gspread.client.Client:
     # Create a connection object.
     credentials = service_account.Credentials.from_service_account_info(
         st.secrets["gcp_service_account"],
-        scopes=[
-            "https://www.googleapis.com/auth/spreadsheets",
-        ],
+        scopes=SCOPES,
     )
     return gspread.authorize(credentials)
+
+
+def get_client() -> gspread.client.Client | None:
+    if is_offline():
+        return None
+    return get_google_conn()
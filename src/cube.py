@@ -0,0 +1,52 @@
+from datetime import date
+
+import pandas as pd
+
+from src.munge import add_person_groups, get_date_slice
+
+# Counts of the exploded names frame keyed by (date, name) with one column per
+# n_shown. It is built once per data load; date-range queries slice it instead
+# of regrouping every exploded row.
+
+
+def counts_to_cube(name_counts: pd.Series) -> pd.DataFrame:
+    if name_counts.empty:
+        index = pd.MultiIndex.from_arrays([[], []], names=["date", "name"])
+        return pd.DataFrame(index=index, dtype="int64")
+    return name_counts.unstack("n_shown", fill_value=0).sort_index(axis=1)
+
+
+def slice_count_cube(
+    cube: pd.DataFrame, first_date: date, last_date: date
+) -> pd.DataFrame:
+    dates = cube.index.get_level_values("date")
+    sliced = cube.iloc[get_date_slice(dates, first_date, last_date)]
+    # Only keep the n_shown columns that occur inside the range.
+    return sliced.loc[:, sliced.sum() > 0]
+
+
+def get_records_df(
+    cube: pd.DataFrame,
+    person_df: pd.DataFrame,
+    first_date: date,
+    last_date: date,
+    group_by_date: bool = False,
+) -> pd.DataFrame:
+    df = slice_count_cube(cube, first_date, last_date)
+    if not group_by_date:
+        df = df.groupby(level="name", observed=True).sum()
+    return format_records_df(df, person_df)
+
+
+def format_records_df(counts: pd.DataFrame, person_df: pd.DataFrame) -> pd.DataFrame:
+    # `counts` is indexed by name (or date and name) with one column per n_shown.
+    n_shown_columns = list(counts.columns)
+
+    df = counts.assign(total=counts.sum(axis=1))
+    df = df[["total"] + n_shown_columns]
+    df = df.sort_values(by=["total"] + n_shown_columns, ascending=False).reset_index()
+
+    df.columns = pd.Index([str(col) for col in df.columns])
+    df = add_person_groups(df, person_df)
+    # One row per name, so plain strings are cheap and keep plotly happy.
+    return df.astype({"name": object, "group": object})
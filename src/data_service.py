@@ -0,0 +1,112 @@
+import threading
+import time
+from dataclasses import fields, is_dataclass, replace
+from typing import Any, Callable
+
+import pandas as pd
+
+# One process-wide holder of the processed data, shared by every session.
+# Readers always get the last good load straight away; a background thread
+# reloads it shortly before it goes stale and swaps the result in with a
+# single assignment, so a rerun sees either the old data or the new, never a
+# mix. With copy-on-write (enabled in src/__init__.py), the shallow copies
+# of the frames handed to sessions share memory with the held frames but any
+# write to them copies first, so a session can't change another's frames.
+# Everything else in the data (the person and name indexes, the analytics
+# database) is shared as-is and only ever read.
+
+REFRESH_INTERVAL = 600
+REFRESH_AHEAD = 60
+RETRY_INTERVAL = 30
+
+
+def get_session_view(value: Any) -> Any:
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    if is_dataclass(value) and not isinstance(value, type):
+        return replace(
+            value,
+            **{
+                field.name: get_session_view(getattr(value, field.name))
+                for field in fields(value)
+                if field.init
+            },
+        )
+    return value
+
+
+class DataService:
+    def __init__(
+        self,
+        load: Callable[[], Any],
+        refresh_interval: float = REFRESH_INTERVAL,
+        refresh_ahead: float = REFRESH_AHEAD,
+    ):
+        self.load = load
+        self.refresh_interval = refresh_interval
+        self.refresh_ahead = refresh_ahead
+        self.loaded_at: float | None = None
+        self.refreshes = 0
+        self.last_error: str | None = None
+        self._data: Any = None
+        self._due_at = 0.0
+        self._refreshing = False
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def get(self) -> Any:
+        if self._data is None:
+            # Only the very first load is waited for, and only once.
+            with self._load_lock:
+                if self._data is None:
+                    self._swap(self.load())
+        elif time.monotonic() >= self._due_at:
+            self.refresh_in_background()
+        return get_session_view(self._data)
+
+    def get_info(self) -> dict[str, Any]:
+        return {
+            "loaded_at": time.ctime(self.loaded_at) if self.loaded_at else None,
+            "refreshes": self.refreshes,
+            "refreshing": self._refreshing,
+            "last_error": self.last_error,
+        }
+
+    def refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(
+            target=self._refresh, name="chekilytics-refresh", daemon=True
+        ).start()
+
+    def _refresh(self) -> None:
+        try:
+            with self._load_lock:
+                data = self.load()
+            self._swap(data)
+            self.refreshes += 1
+            self.last_error = None
+        except Exception as e:
+            # Keep serving the last good data and try again a little later.
+            self.last_error = repr(e)
+            self._schedule(RETRY_INTERVAL)
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _swap(self, data: Any) -> None:
+        self._data = data
+        self.loaded_at = time.time()
+        self._schedule(self.refresh_interval - self.refresh_ahead)
+
+    def _schedule(self, delay: float) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._due_at = time.monotonic() + delay
+            self._timer = threading.Timer(delay, self.refresh_in_background)
+            self._timer.daemon = True
+            self._timer.start()
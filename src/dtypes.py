@@ -0,0 +1,90 @@
+import pandas as pd
+
+# Loaded frames are object-dtype strings, with nulls for blank cells. Casting
+# repeated strings to categoricals (with one shared set of categories per
+# domain, so merges and groupbys stay on codes) and numbers to small types
+# shrinks the cached frames.
+
+
+def nullify_empty_strings(df: pd.DataFrame) -> pd.DataFrame:
+    # Blank sheet cells arrive as "". They become nulls once, on load, so every
+    # later step tells a missing value apart with isna alone.
+    return df.replace("", None)
+
+
+def get_category_values(column: pd.Series) -> pd.Series:
+    # Already compacted columns contribute their (used) categories rather
+    # than every value, which keeps recompacting grown frames cheap.
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return pd.Series(column.cat.remove_unused_categories().cat.categories)
+    return column.astype(object)
+
+
+def get_shared_category(*columns: pd.Series) -> pd.CategoricalDtype:
+    values = pd.concat([get_category_values(column) for column in columns]).dropna()
+    # Sorted categories keep groupby output in the same order as plain strings.
+    return pd.CategoricalDtype(pd.Index(values.unique()).sort_values())
+
+
+def downcast_ints(column: pd.Series) -> pd.Series:
+    return pd.to_numeric(column, downcast="integer")
+
+
+def to_float32(column: pd.Series) -> pd.Series:
+    return pd.to_numeric(column, errors="coerce").astype("float32")
+
+
+def concat_frames(df: pd.DataFrame, new_rows: pd.DataFrame) -> pd.DataFrame:
+    # Categorical columns are widened to cover the new rows first; concat
+    # would otherwise fall back to object for the whole column.
+    dtypes = {
+        col: get_shared_category(df[col], new_rows[col])
+        for col in df.columns
+        if isinstance(df[col].dtype, pd.CategoricalDtype)
+    }
+    return pd.concat([df.astype(dtypes), new_rows.astype(dtypes)])
+
+
+def get_memory_usage(frames: dict[str, pd.DataFrame]) -> pd.Series:
+    return pd.Series(
+        {name: df.memory_usage(deep=True).sum() for name, df in frames.items()}
+    )
+
+
+def compact_frames(
+    cheki_df: pd.DataFrame,
+    names_df: pd.DataFrame,
+    person_df: pd.DataFrame,
+    venue_df: pd.DataFrame,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    cheki_name_cols = [col for col in cheki_df.columns if "name" in col]
+    location = get_shared_category(
+        cheki_df["location"], names_df["location"], venue_df["location"]
+    )
+    person = get_shared_category(
+        *(cheki_df[col] for col in cheki_name_cols), names_df["person"]
+    )
+    name = get_shared_category(names_df["name"], person_df["name1"])
+    # "Solo" is filled in for unknown groups by munge.add_person_groups.
+    group = get_shared_category(
+        names_df["group"], person_df["group1"], pd.Series(["Solo"])
+    )
+
+    cheki_df = cheki_df.astype(
+        {"location": location} | {col: person for col in cheki_name_cols}
+    )
+    cheki_df["year"] = downcast_ints(cheki_df["year"])
+    cheki_df["month"] = downcast_ints(cheki_df["month"])
+
+    names_df = names_df.astype(
+        {"location": location, "person": person, "name": name, "group": group}
+    )
+    for col in ["year", "month", "n_shown"]:
+        names_df[col] = downcast_ints(names_df[col])
+
+    person_df = person_df.astype({"name1": name, "group1": group})
+
+    venue_df = venue_df.astype({"location": location})
+    venue_df["latitude"] = to_float32(venue_df["latitude"])
+    venue_df["longitude"] = to_float32(venue_df["longitude"])
+    return cheki_df, names_df, person_df, venue_df
@@ -0,0 +1,101 @@
+import re
+import time
+from typing import Any
+
+# An in-memory stand-in for the parts of gspread the loaders use, so fetches
+# can be benchmarked and exercised offline. `latency` is added to every
+# simulated API request and `requests` counts them.
+
+RANGE_RE = re.compile(r"^'(?P<title>(?:[^']|'')*)'(?:!(?P<start>\d+):(?P<end>\d+))?$")
+
+
+def trim_values(values: list[list[str]]) -> list[list[str]]:
+    # The Sheets API drops trailing empty cells and trailing empty rows.
+    rows = [list(row) for row in values]
+    for row in rows:
+        while row and row[-1] == "":
+            row.pop()
+    while rows and not rows[-1]:
+        rows.pop()
+    return rows
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet: "FakeSpreadsheet", title: str, values: list):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.values = [list(row) for row in values]
+
+    def get_values_range(self, start: int, end: int) -> list[list[str]]:
+        return trim_values(self.values[start - 1 : end])
+
+    def get_all_values(self) -> list[list[str]]:
+        self.spreadsheet.client.request()
+        rows = trim_values(self.values)
+        width = max([len(row) for row in rows], default=0)
+        return [row + [""] * (width - len(row)) for row in rows]
+
+
+class FakeSpreadsheet:
+    def __init__(self, client: "FakeClient", key: str, sheets: dict[str, list]):
+        self.client = client
+        self.id = key
+        self.modified = 0
+        self._worksheets = [
+            FakeWorksheet(self, title, values) for title, values in sheets.items()
+        ]
+
+    def touch(self) -> None:
+        self.modified += 1
+
+    def worksheets(self) -> list[FakeWorksheet]:
+        self.client.request()
+        return list(self._worksheets)
+
+    def get_worksheet(self, index: int) -> FakeWorksheet:
+        self.client.request()
+        return self._worksheets[index]
+
+    def values_batch_get(self, ranges: list[str]) -> dict[str, Any]:
+        self.client.request()
+        by_title = {worksheet.title: worksheet for worksheet in self._worksheets}
+        value_ranges = []
+        for a1 in ranges:
+            match = RANGE_RE.match(a1)
+            if match is None:
+                raise ValueError(f"Unsupported range: {a1}")
+            worksheet = by_title[match["title"].replace("''", "'")]
+            if match["start"] is None:
+                values = trim_values(worksheet.values)
+            else:
+                values = worksheet.get_values_range(
+                    int(match["start"]), int(match["end"])
+                )
+            value_range: dict[str, Any] = {"range": a1}
+            if values:
+                value_range["values"] = values
+            value_ranges.append(value_range)
+        return {"spreadsheetId": self.id, "valueRanges": value_ranges}
+
+
+class FakeClient:
+    def __init__(self, sheets: dict[str, list], latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+        self.spreadsheet = FakeSpreadsheet(self, "fake", sheets)
+
+    def request(self) -> None:
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def open_by_url(self, url: str) -> FakeSpreadsheet:
+        self.request()
+        return self.spreadsheet
+
+    def open_by_key(self, key: str) -> FakeSpreadsheet:
+        return self.open_by_url(key)
+
+    def get_file_drive_metadata(self, id: str) -> dict[str, str]:
+        self.request()
+        return {"id": id, "modifiedTime": str(self.spreadsheet.modified)}
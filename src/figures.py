@@ -1,10 +1,71 @@
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable
+
 import pandas as pd
 import plotly.express as px
 from plotly.graph_objects import Figure
 
 from src.color_map import xkcd_colors
+from src.instrumentation import span
+
+# Figures are cached across reruns and sessions, keyed by a content hash of
+# the (small, already aggregated) input frame plus the figure arguments, so an
+# unrelated widget change reuses the previous figure.
+FIGURE_CACHE_SIZE = 64
+_figure_cache: OrderedDict[str, Figure] = OrderedDict()
+_figure_cache_lock = threading.Lock()
+_figure_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def get_frame_hash(df: pd.DataFrame) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(list(zip(df.columns, df.dtypes.astype(str)))).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def get_figure_cache_info() -> dict[str, int]:
+    with _figure_cache_lock:
+        return _figure_cache_stats | {"size": len(_figure_cache)}
+
+
+def clear_figure_cache() -> None:
+    with _figure_cache_lock:
+        _figure_cache.clear()
+        _figure_cache_stats.update(hits=0, misses=0, evictions=0)
+
+
+def cached_figure(func: Callable[..., Figure]) -> Callable[..., Figure]:
+    @functools.wraps(func)
+    def wrapper(df: pd.DataFrame, *args, **kwargs) -> Figure:
+        key = (
+            f"{func.__name__}:{get_frame_hash(df)}:{args!r}:{sorted(kwargs.items())!r}"
+        )
+        with span(func.__name__, rows_in=len(df)) as s:
+            with _figure_cache_lock:
+                if key in _figure_cache:
+                    _figure_cache.move_to_end(key)
+                    _figure_cache_stats["hits"] += 1
+                    s.cache = "hit"
+                    return _figure_cache[key]
+                _figure_cache_stats["misses"] += 1
+            s.cache = "miss"
+
+            fig = func(df, *args, **kwargs)
+            with _figure_cache_lock:
+                _figure_cache[key] = fig
+                while len(_figure_cache) > FIGURE_CACHE_SIZE:
+                    _figure_cache.popitem(last=False)
+                    _figure_cache_stats["evictions"] += 1
+            return fig
+
+    return wrapper
 
 
+@cached_figure
 def get_bar_fig(df: pd.DataFrame, **kwargs):
     return px.bar(
         df.sort_values(by="total", ascending=False),
@@ -17,6 +78,7 @@ def get_bar_fig(df: pd.DataFrame, **kwargs):
     )
 
 
+@cached_figure
 def get_pie_fig(df: pd.DataFrame) -> Figure:
     fig = px.pie(
         df.sort_values(by="total", ascending=True),
@@ -29,6 +91,7 @@ def get_pie_fig(df: pd.DataFrame) -> Figure:
     return fig
 
 
+@cached_figure
 def get_treemap_fig(df: pd.DataFrame, use_groups: bool = True) -> Figure:
     groupby_paths = ["name"]
     if use_groups:
@@ -42,5 +105,6 @@ def get_treemap_fig(df: pd.DataFrame, use_groups: bool = True) -> Figure:
     )
 
 
+@cached_figure
 def get_cheki_bar_fig(df: pd.DataFrame):
     return px.bar(df, y="count")
@@ -1,8 +1,119 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
 import pydeck as pdk
 
+from src.figures import get_frame_hash
+from src.instrumentation import span
+
+# Venues are binned on web-mercator tile grids so the deck only receives one
+# row per occupied cell. A view at zoom z uses the grid at z + CELL_ZOOM_OFFSET
+# (2 ** CELL_ZOOM_OFFSET cells across each 256px tile). The grids for every
+# level are built once per venue-count frame (a date range and persons) and
+# kept across reruns and sessions, so moving the zoom only picks a level.
+# Each cell also remembers its busiest venue (as a row of the venue-count
+# frame), which labels the cell in the tooltip.
+CELL_ZOOM_OFFSET = 3
+GRID_LEVELS = list(range(4, 19))
+DEFAULT_ZOOM = 10
+PYRAMID_CACHE_SIZE = 16
+_pyramid_cache: OrderedDict[str, dict[int, pd.DataFrame]] = OrderedDict()
+_pyramid_cache_lock = threading.Lock()
+
+
+def get_cell_index(df: pd.DataFrame, level: int) -> tuple[np.ndarray, np.ndarray]:
+    n = 2**level
+    lat = np.radians(df["latitude"].to_numpy(dtype=float).clip(-85.05, 85.05))
+    lon = df["longitude"].to_numpy(dtype=float)
+    x = np.floor((lon + 180) / 360 * n).astype(np.int64)
+    y = np.floor((1 - np.arcsinh(np.tan(lat)) / np.pi) / 2 * n).astype(np.int64)
+    return x.clip(0, n - 1), y.clip(0, n - 1)
+
+
+def aggregate_cells(cells: pd.DataFrame) -> pd.DataFrame:
+    groups = cells.groupby(["x", "y"], sort=False)
+    top = cells.loc[groups["top_count"].idxmax().to_numpy(), ["top", "top_count"]]
+    sums = groups[["count", "venues", "weighted_lat", "weighted_lon"]].sum()
+    return sums.reset_index().assign(
+        top=top["top"].to_numpy(), top_count=top["top_count"].to_numpy()
+    )
+
+
+def build_grid_pyramid(
+    df: pd.DataFrame, levels: list[int] = GRID_LEVELS
+) -> dict[int, pd.DataFrame]:
+    # Bin once at the finest level, then merge each level's cells 2x2 into its
+    # parent, carrying count-weighted coordinate sums for the centroids.
+    levels = sorted(levels, reverse=True)
+    count = df["count"].to_numpy(dtype=float)
+    x, y = get_cell_index(df, levels[0])
+    cells = aggregate_cells(
+        pd.DataFrame(
+            {
+                "x": x,
+                "y": y,
+                "count": count,
+                "venues": 1,
+                "weighted_lat": df["latitude"].to_numpy(dtype=float) * count,
+                "weighted_lon": df["longitude"].to_numpy(dtype=float) * count,
+                "top": np.arange(len(df)),
+                "top_count": count,
+            }
+        )
+    )
+
+    pyramid = {levels[0]: cells}
+    for child, level in zip(levels, levels[1:]):
+        shift = child - level
+        cells = aggregate_cells(
+            cells.assign(x=cells.x // 2**shift, y=cells.y // 2**shift)
+        )
+        pyramid[level] = cells
+    return pyramid
+
+
+def get_grid_pyramid(df: pd.DataFrame) -> dict[int, pd.DataFrame]:
+    # Keyed by the only columns the grids are built from; the hash covers the
+    # row order too, so the cells' top rows point into any frame with this key.
+    key = get_frame_hash(df[["latitude", "longitude", "count"]])
+    with _pyramid_cache_lock:
+        if key in _pyramid_cache:
+            _pyramid_cache.move_to_end(key)
+            return _pyramid_cache[key]
+    with span("build_grid_pyramid", rows_in=len(df)):
+        pyramid = build_grid_pyramid(df)
+    with _pyramid_cache_lock:
+        _pyramid_cache[key] = pyramid
+        while len(_pyramid_cache) > PYRAMID_CACHE_SIZE:
+            _pyramid_cache.popitem(last=False)
+    return pyramid
+
+
+def get_map_cells(
+    df: pd.DataFrame, pyramid: dict[int, pd.DataFrame], zoom: int
+) -> pd.DataFrame:
+    levels = np.array(sorted(pyramid))
+    target = zoom + CELL_ZOOM_OFFSET
+    level = levels[np.abs(levels - target).argmin()]
+    cells = pyramid[level]
+    top = df.iloc[cells["top"].to_numpy()]
+    return pd.DataFrame(
+        {
+            "latitude": cells["weighted_lat"] / cells["count"],
+            "longitude": cells["weighted_lon"] / cells["count"],
+            "count": cells["count"].astype(int),
+            "venues": cells["venues"],
+            "location": top["location"].astype(object).to_numpy(),
+            "full_address": top["full_address"].astype(object).to_numpy(),
+        }
+    )
+
 
-def get_map_layer(df: pd.DataFrame, map_type: str) -> pdk.Deck:
+def get_map_layer(
+    df: pd.DataFrame, map_type: str, zoom: int = DEFAULT_ZOOM
+) -> pdk.Deck:
     if map_type == "column":
         pitch = 50
         layer = pdk.Layer(
@@ -52,12 +163,12 @@ def get_map_layer(df: pd.DataFrame, map_type: str) -> pdk.Deck:
         initial_view_state=pdk.ViewState(
             latitude=35.678942,
             longitude=139.737892,
-            zoom=10,
+            zoom=zoom,
             pitch=pitch,
         ),
-        # tooltip={
-        #    "html": "Location:{full_address}, count: {count}",
-        # },
-        tooltip=True,
+        tooltip={
+            "html": "{location}<br/>{full_address}<br/>"
+            "count: {count}, venues in this area: {venues}",
+        },
         layers=[layer],
     )
@@ -0,0 +1,125 @@
+import threading
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+
+import src.munge as munge
+from src.aggregates import Aggregates, apply_delta, get_aggregates
+from src.dtypes import concat_frames
+from src.instrumentation import span
+from src.sheets import get_datetime_cols
+
+# The cheki sheet mostly grows by appends. The processed frames and stored
+# counts of the previous load are kept process-wide; on a refresh only rows
+# whose id is new or whose content hash changed are parsed and exploded, and
+# their contribution (minus that of the rows they replace) is applied to the
+# counts. The result matches processing the whole sheet again.
+
+
+@dataclass
+class ChekiState:
+    columns: list[str]
+    hashes: pd.Series
+    cheki_df: pd.DataFrame
+    names_df: pd.DataFrame
+    aggregates: Aggregates
+    n_changed: int
+
+
+_state: ChekiState | None = None
+_state_lock = threading.Lock()
+
+
+def get_state() -> ChekiState | None:
+    with _state_lock:
+        return _state
+
+
+def set_state(state: ChekiState | None) -> None:
+    global _state
+    with _state_lock:
+        _state = state
+
+
+def get_row_hashes(cheki_df: pd.DataFrame) -> pd.Series:
+    return pd.util.hash_pandas_object(cheki_df, index=False)
+
+
+def get_changed_rows(
+    previous: pd.Series, hashes: pd.Series
+) -> tuple[pd.Index, pd.Index]:
+    # Changed rows are new or edited; dropped rows are edited or removed.
+    common = hashes.index.intersection(previous.index)
+    unchanged = common[hashes[common].to_numpy() == previous[common].to_numpy()]
+    return (
+        hashes.index.difference(unchanged, sort=False),
+        previous.index.difference(unchanged, sort=False),
+    )
+
+
+def prepare_rows(cheki_df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    with span("get_datetime_cols", rows_in=len(cheki_df)):
+        # Kept date-sorted so every range selection is a binary-search slice.
+        cheki_df = get_datetime_cols(cheki_df).sort_values("date", kind="stable")
+    with span("group_cheki_by_name", rows_in=len(cheki_df)) as s:
+        names_df = munge.group_cheki_by_name(cheki_df)
+        s.rows_out = len(names_df)
+    return cheki_df, names_df
+
+
+def build_state(cheki_df: pd.DataFrame, hashes: pd.Series) -> ChekiState:
+    columns = list(cheki_df.columns)
+    cheki_df, names_df = prepare_rows(cheki_df)
+    return ChekiState(
+        columns=columns,
+        hashes=hashes,
+        cheki_df=cheki_df,
+        names_df=names_df,
+        aggregates=get_aggregates(cheki_df, names_df),
+        n_changed=len(cheki_df),
+    )
+
+
+def sort_like_full_build(
+    cheki_df: pd.DataFrame, names_df: pd.DataFrame
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    # A full build stable-sorts the sheet (in row order) by date and explodes
+    # names row-major; the merged frames are put back in exactly that order.
+    cheki_df = cheki_df.sort_index(kind="stable").sort_values("date", kind="stable")
+    positions = pd.Series(np.arange(len(cheki_df)), index=cheki_df.index)
+    order = np.argsort(positions[names_df["cheki_id"]].to_numpy(), kind="stable")
+    return cheki_df, names_df.iloc[order].reset_index(drop=True)
+
+
+def update_state(
+    state: ChekiState | None, cheki_df: pd.DataFrame, hashes: pd.Series | None = None
+) -> ChekiState:
+    if hashes is None:
+        hashes = get_row_hashes(cheki_df)
+    if state is None or state.columns != list(cheki_df.columns):
+        return build_state(cheki_df, hashes)
+
+    changed, dropped = get_changed_rows(state.hashes, hashes)
+    if changed.empty and dropped.empty:
+        return replace(state, hashes=hashes, n_changed=0)
+
+    new_cheki, new_names = prepare_rows(cheki_df.loc[changed])
+    is_dropped = state.names_df["cheki_id"].isin(dropped)
+    aggregates = apply_delta(
+        state.aggregates,
+        added=get_aggregates(new_cheki, new_names),
+        removed=get_aggregates(state.cheki_df.loc[dropped], state.names_df[is_dropped]),
+    )
+    merged_cheki, merged_names = sort_like_full_build(
+        concat_frames(state.cheki_df.drop(index=dropped), new_cheki),
+        concat_frames(state.names_df[~is_dropped], new_names),
+    )
+    return ChekiState(
+        columns=state.columns,
+        hashes=hashes,
+        cheki_df=merged_cheki,
+        names_df=merged_names,
+        aggregates=aggregates,
+        n_changed=len(changed),
+    )
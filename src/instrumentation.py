@@ -0,0 +1,105 @@
+import json
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any
+
+# Lightweight spans around pipeline stages. Nothing is recorded unless a
+# recording is active for the current rerun; otherwise span() hands back a
+# shared no-op object, so instrumented code costs one ContextVar lookup.
+
+_records: ContextVar[list["Span"] | None] = ContextVar("span_records", default=None)
+
+
+class Span:
+    __slots__ = (
+        "name",
+        "rows_in",
+        "rows_out",
+        "cache",
+        "cached",
+        "records_before",
+        "start",
+        "end",
+    )
+
+    def __init__(self, name: str, rows_in: int | None, cached: bool):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out: int | None = None
+        self.cache: str | None = None
+        self.cached = cached
+        self.records_before = 0
+        self.start = 0.0
+        self.end = 0.0
+
+    def __enter__(self) -> "Span":
+        records = _records.get()
+        self.records_before = len(records) if records is not None else 0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        records = _records.get()
+        if records is None:
+            return
+        # A cached stage that ran any nested span computed its result: a miss.
+        if self.cached and self.cache is None:
+            self.cache = "miss" if len(records) > self.records_before else "hit"
+        self.end = time.perf_counter()
+        records.append(self)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "stage": self.name,
+            "ms": round((self.end - self.start) * 1000, 3),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "cache": self.cache,
+        }
+
+
+class NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "NullSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+def span(name: str, rows_in: int | None = None, cached: bool = False) -> Any:
+    if _records.get() is None:
+        return NULL_SPAN
+    return Span(name, rows_in, cached)
+
+
+def is_recording() -> bool:
+    return _records.get() is not None
+
+
+def start_recording() -> None:
+    _records.set([])
+
+
+def stop_recording() -> list[dict[str, Any]]:
+    records = _records.get() or []
+    _records.set(None)
+    # Spans are appended as they finish; report them in start order.
+    return [record.to_dict() for record in sorted(records, key=lambda r: r.start)]
+
+
+def to_json_lines(spans: list[dict[str, Any]], **fields: Any) -> str:
+    timestamp = datetime.now().isoformat()
+    return "".join(
+        json.dumps({"timestamp": timestamp} | fields | record, ensure_ascii=False)
+        + "\n"
+        for record in spans
+    )
@@ -63,6 +63,13 @@ class Cost(BaseModel):
     currency: Literal["USD", "JPY", "EUR", "CND"] = "JPY"
 
 
+class ChekiRow(BaseModel):
+    cheki_id: int
+    date: date | None
+    location: str
+    names: list[str]
+
+
 class Cheki(BaseModel):
     format: Literal["mini", "wide", "square"]
     date: date | None
@@ -1,9 +1,7 @@
 from datetime import date
-from typing import Any
 
 import numpy as np
 import pandas as pd
-import streamlit as st
 
 
 def get_records_df(
@@ -14,7 +12,7 @@ def get_records_df(
 ) -> pd.DataFrame:
     n_shown_columns = sorted(names_df.n_shown.unique())
     df = (
-        names_df.groupby(groupby_select + ["n_shown"])["person"]
+        names_df.groupby(groupby_select + ["n_shown"], observed=True)["person"]
         .count()
         .sort_index(level=sort_level)
         .reset_index()
@@ -31,6 +29,10 @@ def get_records_df(
     df = df.sort_values(by=["total"] + n_shown_columns, ascending=False).reset_index()
 
     df.columns = pd.Index([str(col) for col in df.columns])
+    return add_person_groups(df, person_df)
+
+
+def add_person_groups(df: pd.DataFrame, person_df: pd.DataFrame) -> pd.DataFrame:
     df_p = person_df[["name1", "group1"]]
     df_p = df_p.rename(columns={"name1": "name", "group1": "group"})
     df = pd.merge(df, df_p, how="left", on="name")
@@ -40,25 +42,38 @@ def get_records_df(
 
 def group_cheki_by_name(df: pd.DataFrame) -> pd.DataFrame:
     name_cols = [col for col in df.columns if "name" in col]
-    chekis = []
-    for idx, row in df.iterrows():
-        name_count = len(list(filter(None, row[name_cols].values)))
-        for col in df.columns:
-            if (row[col] is not np.nan) and ("name" in col) and (row[col]):
-                chekis.append(
-                    {
-                        "cheki_id": idx,
-                        "date": row["date"].date(),
-                        "person": row[col],
-                        "location": row["location"],
-                        "year": row["date"].year,
-                        "month": row["date"].month,
-                        "name": split_name_group(row[col])[0],
-                        "group": split_name_group(row[col])[1],
-                        "n_shown": name_count,
-                    }
-                )
-    return pd.DataFrame(chekis)
+    names = df[name_cols]
+    shown = names.notna().to_numpy()
+    n_shown = shown.sum(axis=1)
+
+    # Row-major positions of every non-empty name cell, same order as iterrows.
+    row_pos, col_pos = np.nonzero(shown)
+    persons = pd.Series(names.to_numpy()[row_pos, col_pos], dtype=object)
+    dates = df["date"].iloc[row_pos].reset_index(drop=True)
+    # Each distinct label is split (and each day made a date) once; the rows
+    # share the resulting objects instead of holding a copy each.
+    person_codes, labels = pd.factorize(persons)
+    name_group = split_name_group_series(pd.Series(labels, dtype=object))
+    name_group = name_group.take(person_codes).reset_index(drop=True)
+    day_codes, days = pd.factorize(dates, use_na_sentinel=False)
+    # Blank dates leave NaN years and months, as in the cheki frame.
+    part_dtype = "int64" if dates.notna().all() else "float64"
+
+    # The columns are all built here, so the frame takes them without a copy.
+    return pd.DataFrame(
+        {
+            "cheki_id": df.index[row_pos],
+            "date": days.date.take(day_codes),
+            "person": persons,
+            "location": df["location"].to_numpy()[row_pos],
+            "year": dates.dt.year.astype(part_dtype),
+            "month": dates.dt.month.astype(part_dtype),
+            "name": name_group["name"],
+            "group": name_group["group"],
+            "n_shown": n_shown[row_pos].astype("int64"),
+        },
+        copy=False,
+    )
 
 
 def split_name_group(person: str) -> list[str]:
@@ -73,44 +88,50 @@ def split_name_group(person: str) -> list[str]:
     return []
 
 
-def get_cutoff_data(df: pd.DataFrame, cutoff: int) -> pd.DataFrame:
-    df_top = df[df["total"] >= cutoff].reset_index(drop=True)
-    df_bottom = df[df["total"] < cutoff]
-    others_count = df_bottom["total"].sum()
-    others_df = pd.DataFrame(
-        {"total": [others_count], "name": ["OTHERS"], "group": ["OTHERS"]}
-    )
-    df_top = pd.concat([df_top, others_df], axis=0)
-    return df_top
+def normalize_whitespace(series: pd.Series) -> pd.Series:
+    return series.str.replace(r"\s+", " ", regex=True).str.strip()
 
 
-def get_all_names(df: pd.DataFrame) -> list[str]:
-    return sorted([name for name in df.name1.unique() if name != ""])
+def split_name_group_series(persons: pd.Series) -> pd.DataFrame:
+    # Vectorized split_name_group: a missing "@group" falls back to the name.
+    split = persons.str.split("@", n=1, expand=True).reindex(columns=[0, 1])
+    name = normalize_whitespace(split[0].astype(object))
+    group = normalize_whitespace(split[1].astype(object)).fillna(name)
+    return pd.DataFrame({"name": name, "group": group})
 
 
-def get_dates(input_df: pd.DataFrame) -> Any:
-    earliest_date = input_df.date.min()
-    today = date.today()
-    first_date = earliest_date
-    last_date = today
+def get_date_slice(dates: pd.Index, first_date: date, last_date: date) -> slice:
+    # Inclusive range over dates sorted ascending, found by binary search.
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        first_date, last_date = pd.Timestamp(first_date), pd.Timestamp(last_date)
+    start = dates.searchsorted(first_date, side="left")
+    stop = dates.searchsorted(last_date, side="right")
+    return slice(start, stop)
+
+
+def slice_date_range(
+    df: pd.DataFrame, first_date: date, last_date: date
+) -> pd.DataFrame:
+    return df.iloc[get_date_slice(pd.Index(df["date"]), first_date, last_date)]
 
-    date_selector = st.date_input(
-        "Select date range",
-        value=[earliest_date, today],
-        min_value=earliest_date,
-        max_value=today,
-    )
 
-    if isinstance(date_selector, date):
-        return (date_selector, today)
+def get_others_row(df_bottom: pd.DataFrame) -> pd.DataFrame:
+    # The summed counts keep their integer dtype, so the OTHERS row doesn't
+    # turn the count columns into floats.
+    others_df = df_bottom.select_dtypes("number").sum().to_frame().T
+    return others_df.assign(name="OTHERS", group="OTHERS")
 
-    if len(date_selector) == 0:
-        return first_date, last_date
 
-    if len(date_selector) >= 1:
-        first_date = date_selector[0]  # type: ignore
+def get_cutoff_data(df: pd.DataFrame, cutoff: int) -> pd.DataFrame:
+    df_top = df[df["total"] >= cutoff].reset_index(drop=True)
+    df_bottom = df[df["total"] < cutoff]
+    df_top = pd.concat([df_top, get_others_row(df_bottom)], axis=0)
+    return df_top
 
-    if len(date_selector) >= 2:
-        last_date = date_selector[1]  # type: ignore
 
-    return first_date, last_date
+def get_top_n_data(df: pd.DataFrame, top_n: int) -> pd.DataFrame:
+    df_top = df.head(top_n).reset_index(drop=True)
+    df_bottom = df.iloc[top_n:]
+    if df_bottom.empty:
+        return df_top
+    return pd.concat([df_top, get_others_row(df_bottom)], axis=0, ignore_index=True)
@@ -0,0 +1,121 @@
+from dataclasses import dataclass, replace
+
+import gspread
+import numpy as np
+import pandas as pd
+
+import src.incremental as incremental
+import src.sql_backend as sql_backend
+from src.aggregates import Aggregates
+from src.cube import counts_to_cube
+from src.dtypes import compact_frames, get_memory_usage
+from src.instrumentation import span
+from src.search import NameIndex, build_name_index, build_person_index
+from src.sheets import get_all_worksheets
+from src.validation import validate_sheets
+from src.venues import build_venue_table
+
+
+@dataclass
+class ChekiData:
+    cheki_df: pd.DataFrame
+    names_df: pd.DataFrame
+    person_df: pd.DataFrame
+    venue_df: pd.DataFrame
+    venue_table: pd.DataFrame
+    person_index: dict[str, np.ndarray]
+    name_index: NameIndex
+    count_cube: pd.DataFrame
+    aggregates: Aggregates
+    memory_report: pd.DataFrame
+    validation_errors: pd.DataFrame
+    analytics_db: sql_backend.AnalyticsDatabase | None = None
+
+
+def process_cheki_data(
+    cheki_df: pd.DataFrame,
+    person_df: pd.DataFrame,
+    venue_df: pd.DataFrame,
+    use_previous: bool = False,
+) -> ChekiData:
+    with span("get_row_hashes", rows_in=len(cheki_df)):
+        cheki_hashes = incremental.get_row_hashes(cheki_df)
+    with span("validate_sheets", rows_in=len(cheki_df)) as s:
+        validation_errors = validate_sheets(
+            {"cheki": cheki_df, "person": person_df, "venue": venue_df},
+            hashes={"cheki": cheki_hashes},
+        )
+        s.rows_out = len(validation_errors)
+    with span("update_cheki_state", rows_in=len(cheki_df)) as s:
+        previous = incremental.get_state() if use_previous else None
+        state = incremental.update_state(previous, cheki_df, cheki_hashes)
+        cheki_df, names_df = state.cheki_df, state.names_df
+        s.rows_out = state.n_changed
+    with span("build_venue_table", rows_in=len(venue_df)) as s:
+        venue_table = build_venue_table(venue_df)
+        s.rows_out = len(venue_table)
+
+    memory_before = get_memory_usage(
+        {
+            "cheki": cheki_df,
+            "names": names_df,
+            "person": person_df,
+            "venue": venue_df,
+        }
+    )
+    with span("compact_frames", rows_in=len(names_df)):
+        cheki_df, names_df, person_df, venue_df = compact_frames(
+            cheki_df, names_df, person_df, venue_df
+        )
+    # The compacted frames are what the next incremental update builds on;
+    # the uncompacted ones are released here rather than at the end.
+    state = replace(state, cheki_df=cheki_df, names_df=names_df)
+    memory_after = get_memory_usage(
+        {
+            "cheki": cheki_df,
+            "names": names_df,
+            "person": person_df,
+            "venue": venue_df,
+        }
+    )
+
+    with span("build_person_index", rows_in=len(names_df)) as s:
+        person_index = build_person_index(names_df)
+        s.rows_out = len(person_index)
+    with span("build_name_index", rows_in=len(person_df)) as s:
+        name_index = build_name_index(person_df, person_index)
+        s.rows_out = len(name_index.keys)
+    with span("build_count_cube", rows_in=len(state.aggregates.name_counts)) as s:
+        count_cube = counts_to_cube(state.aggregates.name_counts)
+        s.rows_out = len(count_cube)
+    incremental.set_state(state)
+    analytics_db = None
+    if sql_backend.ENABLED:
+        with span("build_database", rows_in=len(names_df)):
+            analytics_db = sql_backend.build_database(cheki_df, names_df, venue_table)
+
+    return ChekiData(
+        cheki_df=cheki_df,
+        names_df=names_df,
+        person_df=person_df,
+        venue_df=venue_df,
+        venue_table=venue_table,
+        person_index=person_index,
+        name_index=name_index,
+        count_cube=count_cube,
+        aggregates=state.aggregates,
+        memory_report=pd.DataFrame(
+            {"before_bytes": memory_before, "after_bytes": memory_after}
+        ),
+        validation_errors=validation_errors,
+        analytics_db=analytics_db,
+    )
+
+
+# Everything derived from the sheets is built here once per data load rather
+# than on every rerun.
+def load_cheki_data(gc: gspread.client.Client | None, url: str) -> ChekiData:
+    with span("get_all_worksheets"):
+        frames = get_all_worksheets(gc, url)
+    # Only rows added or edited since the previous load are reprocessed.
+    return process_cheki_data(*frames, use_previous=True)
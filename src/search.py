@@ -0,0 +1,147 @@
+import difflib
+import unicodedata
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Katakana (ァ..ヶ) folds onto hiragana, which sits 0x60 code points below.
+KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+MAX_MATCHES = 50
+FUZZY_CUTOFF = 0.6
+FUZZY_CANDIDATES = 200
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(name.split("@")[0].split())
+
+
+def fold_name(name: str) -> str:
+    # Search key: full- and half-width forms, katakana and hiragana, case and
+    # spacing all compare equal ("天使 さな", "天使さな" and "天使サナ").
+    folded = unicodedata.normalize("NFKC", name).casefold()
+    return "".join(folded.translate(KATAKANA_TO_HIRAGANA).split())
+
+
+def get_bigrams(key: str) -> set[str]:
+    return {key[i : i + 2] for i in range(max(len(key) - 1, 1))}
+
+
+# Inverted index from normalized name to the cheki row ids it appears on, built
+# once per data load from the exploded names frame.
+def build_person_index(names_df: pd.DataFrame) -> dict[str, np.ndarray]:
+    if names_df.empty:
+        return {}
+    grouped = names_df.groupby("name", observed=True, sort=False)["cheki_id"].unique()
+    return grouped.to_dict()
+
+
+def get_cheki_ids(
+    person_index: dict[str, np.ndarray], selected_persons: list[str]
+) -> np.ndarray:
+    id_arrays = [
+        person_index[name]
+        for name in {normalize_name(person) for person in selected_persons}
+        if name in person_index
+    ]
+    if not id_arrays:
+        return np.array([], dtype=np.int64)
+    return np.unique(np.concatenate(id_arrays))
+
+
+# Folded search keys of the roster, built once per data load. A key is a
+# name, "name@group" or "@group"; each maps to the roster names it stands for.
+# Bigrams point to the keys containing them, to shortlist fuzzy candidates.
+# Spellings map a folded name to the ways it is written on the cheki sheet,
+# so a selected person matches every cheki however the name was typed.
+@dataclass
+class NameIndex:
+    names: list[str]
+    keys: list[str]
+    aliases: dict[str, list[str]]
+    bigrams: dict[str, list[int]]
+    spellings: dict[str, list[str]]
+
+
+def build_name_index(
+    person_df: pd.DataFrame, person_index: dict[str, np.ndarray]
+) -> NameIndex:
+    aliases: defaultdict[str, list[str]] = defaultdict(list)
+    for name, group in zip(person_df["name1"], person_df["group1"]):
+        if pd.isna(name) or not (name := normalize_name(name)):
+            continue
+        alias_keys = [fold_name(name)]
+        if pd.notna(group) and group:
+            alias_keys += [fold_name(f"{name}@{group}"), "@" + fold_name(str(group))]
+        for key in alias_keys:
+            if name not in aliases[key]:
+                aliases[key].append(name)
+
+    keys = sorted(aliases)
+    bigrams = defaultdict(list)
+    for i, key in enumerate(keys):
+        for bigram in get_bigrams(key):
+            bigrams[bigram].append(i)
+
+    spellings = defaultdict(list)
+    for spelling in person_index:
+        spellings[fold_name(spelling)].append(spelling)
+
+    return NameIndex(
+        names=sorted({name for names in aliases.values() for name in names}),
+        keys=keys,
+        aliases=dict(aliases),
+        bigrams=dict(bigrams),
+        spellings=dict(spellings),
+    )
+
+
+def get_close_keys(name_index: NameIndex, query: str, limit: int) -> list[str]:
+    # Only the keys sharing the most bigrams with the query are compared.
+    shared: Counter[int] = Counter()
+    for bigram in get_bigrams(query):
+        shared.update(name_index.bigrams.get(bigram, []))
+    candidates = [name_index.keys[i] for i, _ in shared.most_common(FUZZY_CANDIDATES)]
+    return difflib.get_close_matches(query, candidates, n=limit, cutoff=FUZZY_CUTOFF)
+
+
+def search_names(
+    name_index: NameIndex, query: str, limit: int = MAX_MATCHES
+) -> list[str]:
+    # Prefix matches first, then keys containing the query, or failing both
+    # the closest spellings; each key's roster names in turn, without repeats.
+    query = fold_name(query)
+    if not query:
+        return name_index.names
+    keys = name_index.keys
+    start = bisect_left(keys, query)
+    end = start
+    while end < len(keys) and keys[end].startswith(query):
+        end += 1
+    matched_keys = keys[start:end]
+    if len(matched_keys) < limit:
+        matched_keys += [
+            key for key in keys if query in key and not key.startswith(query)
+        ]
+    if not matched_keys:
+        matched_keys = get_close_keys(name_index, query, limit)
+
+    matches: dict[str, None] = {}
+    for key in matched_keys:
+        for name in name_index.aliases[key]:
+            matches.setdefault(name, None)
+        if len(matches) >= limit:
+            break
+    return list(matches)[:limit]
+
+
+def get_spellings(name_index: NameIndex, persons: list[str]) -> list[str]:
+    # The cheki-side names of the selected persons; unknown names pass through.
+    spellings: dict[str, None] = {}
+    for person in persons:
+        name = normalize_name(person)
+        for spelling in name_index.spellings.get(fold_name(name), [name]):
+            spellings.setdefault(spelling, None)
+    return list(spellings)
@@ -0,0 +1,121 @@
+import asyncio
+import json
+from datetime import date
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+import src.compute as compute
+from src.data_service import DataService
+
+# A small local JSON service over src.compute. One event loop accepts the
+# connections and each query runs in a worker thread, so a slow aggregation
+# (or the first load) doesn't hold up other clients. GET only, e.g.
+#   /names?from=2023-01-01&to=2023-12-31&person=A&person=B
+#   /top?n=20    /series?granularity=Week    /venues
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8502
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+
+def get_param(params: dict[str, list[str]], name: str) -> str | None:
+    values = params.get(name)
+    return values[-1] if values else None
+
+
+def get_date_param(params: dict[str, list[str]], name: str) -> date | None:
+    value = get_param(params, name)
+    return date.fromisoformat(value) if value else None
+
+
+def run_query(
+    service: DataService, query: str, params: dict[str, list[str]]
+) -> list[dict[str, Any]]:
+    df = compute.run_query(
+        service.get(),
+        query,
+        first_date=get_date_param(params, "from"),
+        last_date=get_date_param(params, "to"),
+        persons=params.get("person", []),
+        top_n=int(get_param(params, "n") or compute.DEFAULT_TOP_N),
+        granularity=get_param(params, "granularity") or "Month",
+    )
+    return compute.to_records(df)
+
+
+async def handle_request(service: DataService, request_line: bytes) -> tuple[int, Any]:
+    try:
+        method, target, _ = request_line.decode("latin-1").split()
+    except ValueError:
+        return 400, {"error": "Malformed request line"}
+    if method != "GET":
+        return 405, {"error": f"Method {method} not allowed"}
+
+    url = urlsplit(target)
+    query = url.path.strip("/")
+    if query not in compute.QUERIES:
+        return 404, {"error": f"Unknown path {url.path}", "paths": compute.QUERIES}
+    try:
+        params = parse_qs(url.query)
+        return 200, await asyncio.to_thread(run_query, service, query, params)
+    except ValueError as e:
+        return 400, {"error": str(e)}
+    except Exception as e:
+        return 500, {"error": repr(e)}
+
+
+async def handle_connection(
+    service: DataService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> None:
+    try:
+        try:
+            request_line = await reader.readline()
+            # Headers are read past and ignored; requests have no body.
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+        except ValueError:
+            # A line past the stream's limit (64 KiB).
+            status, body = 400, {"error": "Request line or header too long"}
+        else:
+            status, body = await handle_request(service, request_line)
+        payload = json.dumps(body, ensure_ascii=False).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1") + payload
+        )
+        await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(
+    service: DataService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT
+) -> asyncio.Server:
+    return await asyncio.start_server(
+        lambda reader, writer: handle_connection(service, reader, writer), host, port
+    )
+
+
+def serve(
+    service: DataService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT
+) -> None:
+    async def run() -> None:
+        server = await start_server(service, host, port)
+        print(f"Serving {', '.join(compute.QUERIES)} on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
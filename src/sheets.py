@@ -0,0 +1,56 @@
+import gspread
+import pandas as pd
+
+from src.dtypes import nullify_empty_strings
+from src.instrumentation import span
+from src.snapshots import sync_worksheet_grids
+
+# Turning worksheet grids into the loader frames, without Streamlit, so the
+# same loading runs in the app, the CLI and the JSON service.
+
+CHEKI_SHEET = 0
+PERSON_SHEET = 1
+VENUE_SHEET = 3
+
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    # Read the sheet revision so unchanged snapshots skip the download.
+    "https://www.googleapis.com/auth/drive.metadata.readonly",
+]
+
+
+def get_service_account_client(filename: str) -> gspread.client.Client:
+    return gspread.service_account(filename=filename, scopes=SCOPES)
+
+
+# The header row becomes the column names, and blank cells in the rows below
+# it become nulls. The snapshot grid itself is left as it was.
+def grid_to_frame(grid: pd.DataFrame) -> pd.DataFrame:
+    columns = [str(col).lower() for col in grid.iloc[0]]
+    return nullify_empty_strings(grid.iloc[1:]).set_axis(columns, axis=1)
+
+
+def grid_to_location_frame(grid: pd.DataFrame) -> pd.DataFrame:
+    columns = ["_".join(col.lower().split()) for col in grid.iloc[0]]
+    return nullify_empty_strings(grid.iloc[1:]).set_axis(columns, axis=1)
+
+
+# Cheki, person and venue sheets from one spreadsheet open and one batched
+# values request. Not cached here: the shared data service keeps the result
+# and refreshes it in the background. Without a client (offline) the local
+# snapshots are served.
+def get_all_worksheets(
+    gc: gspread.client.Client | None, url: str
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    with span("sync_worksheet_grids"):
+        grids = sync_worksheet_grids(gc, url, [CHEKI_SHEET, PERSON_SHEET, VENUE_SHEET])
+    return (
+        grid_to_frame(grids[CHEKI_SHEET]),
+        grid_to_frame(grids[PERSON_SHEET]),
+        grid_to_location_frame(grids[VENUE_SHEET]),
+    )
+
+
+def get_datetime_cols(df: pd.DataFrame) -> pd.DataFrame:
+    dates = pd.to_datetime(df["date"])
+    return df.assign(date=dates, month=dates.dt.month, year=dates.dt.year)
@@ -0,0 +1,114 @@
+import hashlib
+import os
+from pathlib import Path
+
+import gspread
+import pandas as pd
+from gspread.utils import absolute_range_name
+
+# Raw worksheet grids (header row included) are kept on disk as Parquet so a
+# restart can serve the last download instead of refetching every sheet.
+SNAPSHOT_DIR = Path(os.environ.get("CHEKILYTICS_SNAPSHOT_DIR", ".snapshots"))
+
+
+def get_snapshot_path(url: str, sheet_num: int) -> Path:
+    key = hashlib.sha1(url.encode()).hexdigest()[:16]
+    return SNAPSHOT_DIR / f"{key}_{sheet_num}.parquet"
+
+
+def read_snapshot(url: str, sheet_num: int) -> pd.DataFrame | None:
+    path = get_snapshot_path(url, sheet_num)
+    if not path.exists():
+        return None
+    try:
+        return pd.read_parquet(path)
+    except (OSError, ValueError):
+        return None
+
+
+def write_snapshot(url: str, sheet_num: int, grid: pd.DataFrame) -> None:
+    path = get_snapshot_path(url, sheet_num)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        grid.to_parquet(tmp_path)
+        tmp_path.replace(path)
+    except OSError:
+        # A read-only deployment still works, it just never gets warm starts.
+        pass
+
+
+def values_to_grid(values: list[list[str]], width: int = 0) -> pd.DataFrame:
+    width = max([width] + [len(row) for row in values])
+    grid = pd.DataFrame([row + [""] * (width - len(row)) for row in values])
+    grid = grid.reindex(columns=range(width), fill_value="")
+    grid.columns = pd.Index([str(col) for col in grid.columns])
+    return grid
+
+
+def get_revision(gc: gspread.client.Client, url: str) -> str | None:
+    try:
+        key = gspread.utils.extract_id_from_url(url)
+        return gc.get_file_drive_metadata(key)["modifiedTime"]
+    except Exception:
+        return None
+
+
+def is_fresh(grid: pd.DataFrame, revision: str | None) -> bool:
+    return revision is not None and grid.attrs.get("revision") == revision
+
+
+def batch_get_values(
+    spreadsheet: gspread.Spreadsheet, ranges: list[str]
+) -> list[list[list[str]]]:
+    if not ranges:
+        return []
+    response = spreadsheet.values_batch_get(ranges)
+    return [value_range.get("values", []) for value_range in response["valueRanges"]]
+
+
+def get_offline_grids(
+    snapshots: dict[int, pd.DataFrame | None],
+) -> dict[int, pd.DataFrame]:
+    missing = [sheet_num for sheet_num, grid in snapshots.items() if grid is None]
+    if missing:
+        raise FileNotFoundError(
+            f"No local snapshot for sheets {missing}; load them once while online."
+        )
+    return {
+        sheet_num: grid for sheet_num, grid in snapshots.items() if grid is not None
+    }
+
+
+def sync_worksheet_grids(
+    gc: gspread.client.Client | None, url: str, sheet_nums: list[int]
+) -> dict[int, pd.DataFrame]:
+    snapshots = {sheet_num: read_snapshot(url, sheet_num) for sheet_num in sheet_nums}
+    if gc is None:
+        return get_offline_grids(snapshots)
+    revision = get_revision(gc, url)
+    grids = {
+        sheet_num: snapshot
+        for sheet_num, snapshot in snapshots.items()
+        if snapshot is not None and is_fresh(snapshot, revision)
+    }
+    stale = [sheet_num for sheet_num in sheet_nums if sheet_num not in grids]
+    if not stale:
+        return grids
+
+    # A new revision can be an edit anywhere in a sheet, and the API has no
+    # per-range checksum to tell, so every stale sheet is downloaded whole: one
+    # metadata call and one batched values call cover them all. Unchanged
+    # rows are skipped downstream by their content hashes.
+    spreadsheet = gc.open_by_url(url)
+    worksheets = spreadsheet.worksheets()
+    values = batch_get_values(
+        spreadsheet,
+        [absolute_range_name(worksheets[sheet_num].title) for sheet_num in stale],
+    )
+    for sheet_num, sheet_values in zip(stale, values):
+        grid = values_to_grid(sheet_values)
+        grid.attrs = {"revision": revision}
+        write_snapshot(url, sheet_num, grid)
+        grids[sheet_num] = grid
+    return grids
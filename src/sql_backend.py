@@ -0,0 +1,248 @@
+import hashlib
+import itertools
+import os
+import sqlite3
+import threading
+import weakref
+from contextlib import closing
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+
+from src.aggregates import to_time_series
+from src.cube import format_records_df
+from src.search import normalize_name
+from src.snapshots import SNAPSHOT_DIR
+
+# Optional analytics backend. With CHEKILYTICS_BACKEND=sqlite each data load is
+# also written to a SQLite file next to the snapshots, and the records pivot,
+# the monthly counts and the per-location counts run there as SQL. Only the
+# small aggregated frames come back to the session; the results match the
+# pandas functions they stand in for.
+#
+# Each process writes its own files (named by pid) and deletes one once no
+# data load references it any more, so a rerun still holding an earlier load
+# keeps its database, and other processes sharing the snapshot directory keep
+# theirs. Files left behind by processes that are gone are swept on the next
+# build.
+ENABLED = os.environ.get("CHEKILYTICS_BACKEND", "pandas") == "sqlite"
+DATABASE_DIR = SNAPSHOT_DIR
+
+# Text timestamps compare in date order, and this format matches the
+# boundaries pandas uses when slicing the date-sorted cheki frame.
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+SCHEMA = [
+    "CREATE INDEX cheki_date ON cheki (date)",
+    "CREATE INDEX names_date ON names (date, name, n_shown)",
+    "CREATE INDEX names_name ON names (name, cheki_id)",
+    "CREATE UNIQUE INDEX venues_location ON venues (location)",
+]
+
+
+def get_tables(
+    cheki_df: pd.DataFrame, names_df: pd.DataFrame, venue_table: pd.DataFrame
+) -> dict[str, pd.DataFrame]:
+    return {
+        "cheki": pd.DataFrame(
+            {
+                "cheki_id": cheki_df.index.to_numpy(),
+                "date": cheki_df["date"].dt.strftime(DATETIME_FORMAT),
+                "location": cheki_df["location"].astype(object),
+            }
+        ),
+        "names": pd.DataFrame(
+            {
+                "cheki_id": names_df["cheki_id"].to_numpy(),
+                "date": pd.to_datetime(names_df["date"]).dt.strftime("%Y-%m-%d"),
+                "name": names_df["name"].astype(object),
+                "n_shown": names_df["n_shown"].astype("int64"),
+            }
+        ),
+        "venues": venue_table.rename_axis("location").reset_index(),
+    }
+
+
+# A plain class rather than a dataclass so the session views handed out by
+# the data service share this object instead of copying it.
+class AnalyticsDatabase:
+    def __init__(self, path: Path, digest: str):
+        self.path = path
+        self.digest = digest
+        # Runs when the last data load holding this database is released.
+        weakref.finalize(self, remove_database_file, path)
+
+
+_databases: weakref.WeakValueDictionary[str, AnalyticsDatabase] = (
+    weakref.WeakValueDictionary()
+)
+_build_ids = itertools.count()
+_build_lock = threading.Lock()
+
+
+def remove_database_file(path: Path) -> None:
+    try:
+        path.unlink(missing_ok=True)
+    except OSError:
+        # Still open elsewhere (Windows); a later sweep removes it.
+        pass
+
+
+def get_tables_digest(tables: dict[str, pd.DataFrame]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for table in tables.values():
+        digest.update(pd.util.hash_pandas_object(table, index=False).to_numpy())
+    return digest.hexdigest()
+
+
+def is_running(pid: int) -> bool:
+    if os.name != "posix":
+        # Without a safe liveness check, other processes' files are kept.
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def remove_stale_databases() -> None:
+    live = {database.path for database in _databases.values()}
+    for path in DATABASE_DIR.glob("analytics-*.sqlite"):
+        pid = int(path.stem.split("-")[1])
+        if pid == os.getpid():
+            stale = path not in live  # an earlier process with this pid
+        else:
+            stale = not is_running(pid)
+        if stale:
+            remove_database_file(path)
+
+
+def build_database(
+    cheki_df: pd.DataFrame, names_df: pd.DataFrame, venue_table: pd.DataFrame
+) -> AnalyticsDatabase | None:
+    tables = get_tables(cheki_df, names_df, venue_table)
+    digest = get_tables_digest(tables)
+    with _build_lock:
+        # A reload with unchanged data shares the database still in use.
+        for database in _databases.values():
+            if database.digest == digest:
+                return database
+        path = DATABASE_DIR / (
+            f"analytics-{os.getpid()}-{next(_build_ids)}-{digest[:16]}.sqlite"
+        )
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.unlink(missing_ok=True)
+            with closing(sqlite3.connect(tmp_path)) as conn:
+                for name, table in tables.items():
+                    table.to_sql(name, conn, index=False)
+                for statement in SCHEMA:
+                    conn.execute(statement)
+                conn.commit()
+            tmp_path.replace(path)
+        except OSError:
+            # Without a writable directory the app stays on the pandas path.
+            return None
+        database = AnalyticsDatabase(path, digest)
+        _databases[str(path)] = database
+        remove_stale_databases()
+    return database
+
+
+def query(
+    database: AnalyticsDatabase,
+    sql: str,
+    params: list,
+    dtype: dict[str, str] | None = None,
+) -> pd.DataFrame:
+    uri = f"{database.path.absolute().as_uri()}?mode=ro"
+    with closing(sqlite3.connect(uri, uri=True)) as conn:
+        return pd.read_sql_query(sql, conn, params=params, dtype=dtype)
+
+
+def get_date_params(first_date: date, last_date: date) -> list[str]:
+    return [
+        pd.Timestamp(first_date).strftime(DATETIME_FORMAT),
+        pd.Timestamp(last_date).strftime(DATETIME_FORMAT),
+    ]
+
+
+def get_person_filter(selected_persons: list[str]) -> tuple[str, list[str]]:
+    if not selected_persons:
+        return "", []
+    names = sorted({normalize_name(person) for person in selected_persons})
+    placeholders = ", ".join("?" * len(names))
+    return (
+        " AND cheki_id IN "
+        f"(SELECT cheki_id FROM names WHERE name IN ({placeholders}))",
+        names,
+    )
+
+
+def get_records_df(
+    database: AnalyticsDatabase,
+    person_df: pd.DataFrame,
+    first_date: date,
+    last_date: date,
+    group_by_date: bool = False,
+) -> pd.DataFrame:
+    keys = ["date", "name"] if group_by_date else ["name"]
+    key_list = ", ".join(keys)
+    counts = query(
+        database,
+        f"SELECT {key_list}, n_shown, COUNT(*) AS count FROM names "
+        f"WHERE date BETWEEN ? AND ? GROUP BY {key_list}, n_shown",
+        [first_date.isoformat(), last_date.isoformat()],
+    )
+    if group_by_date:
+        counts["date"] = pd.to_datetime(counts["date"]).dt.date
+    pivot = counts.set_index(keys + ["n_shown"])["count"].unstack(fill_value=0)
+    pivot.columns.name = None
+    return format_records_df(pivot, person_df)
+
+
+def get_cheki_chart_data(
+    database: AnalyticsDatabase,
+    first_date: date,
+    last_date: date,
+    selected_persons: list[str],
+    freq: str = "MS",
+) -> pd.DataFrame:
+    person_filter, person_params = get_person_filter(selected_persons)
+    counts = query(
+        database,
+        "SELECT substr(date, 1, 10) AS day, COUNT(*) AS count "
+        f"FROM cheki WHERE date BETWEEN ? AND ?{person_filter} "
+        "GROUP BY day ORDER BY day",
+        get_date_params(first_date, last_date) + person_params,
+    )
+    # At most one row per day comes back; coarser buckets are resampled here.
+    daily = pd.Series(
+        counts["count"].to_numpy(dtype="int64"),
+        index=pd.DatetimeIndex(pd.to_datetime(counts["day"])),
+    )
+    return to_time_series(daily, freq)
+
+
+def get_cheki_map_data(
+    database: AnalyticsDatabase,
+    first_date: date,
+    last_date: date,
+    selected_persons: list[str],
+) -> pd.DataFrame:
+    person_filter, person_params = get_person_filter(selected_persons)
+    return query(
+        database,
+        "SELECT cheki.location, COUNT(cheki.date) AS count, "
+        "venues.latitude, venues.longitude, venues.full_address "
+        "FROM cheki JOIN venues ON venues.location = cheki.location "
+        f"WHERE date BETWEEN ? AND ?{person_filter} "
+        "GROUP BY cheki.location ORDER BY cheki.location",
+        get_date_params(first_date, last_date) + person_params,
+        dtype={"count": "int64", "latitude": "float64", "longitude": "float64"},
+    )
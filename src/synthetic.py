@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+# Synthetic frames in the shape the loaders return (string columns with nulls
+# for blank cells, index starting at 1), for benchmarks and offline runs
+# without the private sheet.
+
+GIVEN_NAMES = ["さな", "ゆめ", "あむ", "りほ", "春奈", "まどか", "みき", "悠月", "Juri"]
+FAMILY_NAMES = ["天使", "天音", "恵深", "楠木", "雅", "椎名", "濱崎", "瀬乃", ""]
+N_SHOWN_WEIGHTS = [0.7, 0.15, 0.08, 0.05, 0.02]
+
+
+def make_person_df(
+    n_persons: int, n_groups: int, rng: np.random.Generator
+) -> pd.DataFrame:
+    names = [
+        f"{FAMILY_NAMES[i % len(FAMILY_NAMES)]} {GIVEN_NAMES[i % len(GIVEN_NAMES)]}{i}"
+        for i in range(n_persons)
+    ]
+    # Some rows use inconsistent spacing like the real roster.
+    names = [name if i % 5 else name.replace(" ", "") for i, name in enumerate(names)]
+    groups = [f"グループ{g}" for g in rng.integers(0, n_groups, n_persons)]
+    df = pd.DataFrame({"name1": [name.strip() for name in names], "group1": groups})
+    df.index = df.index + 1
+    return df
+
+
+def make_venue_df(n_venues: int, rng: np.random.Generator) -> pd.DataFrame:
+    latitude = rng.normal(35.68, 0.15, n_venues)
+    longitude = rng.normal(139.74, 0.2, n_venues)
+    df = pd.DataFrame(
+        {
+            "location": [f"Venue {i}" for i in range(n_venues)],
+            "latitude": [f"{lat:.6f}" for lat in latitude],
+            "longitude": [f"{lon:.6f}" for lon in longitude],
+            "full_address": [f"東京都 {i}-{i % 9 + 1}" for i in range(n_venues)],
+            "postal_code": [f"1{i % 100:02d}-{i:04d}" for i in range(n_venues)],
+            "country": "Japan",
+            "subdivision": "Tokyo",
+            "municipality": None,
+            "neighborhood": None,
+        }
+    )
+    # A few venues are missing coordinates, as in the sheet.
+    df.loc[df.index % 50 == 49, ["latitude", "longitude"]] = None
+    df.index = df.index + 1
+    return df
+
+
+def make_cheki_df(
+    n_rows: int,
+    person_df: pd.DataFrame,
+    venue_df: pd.DataFrame,
+    rng: np.random.Generator,
+    max_shown: int = 5,
+    start: str = "2018-01-01",
+    end: str = "2025-12-31",
+) -> pd.DataFrame:
+    # Cheki come in batches taken at one event (a date and a venue), and a few
+    # favourite persons account for most of the collection.
+    n_events = max(n_rows // 8, 1)
+    days = pd.date_range(start, end).strftime("%Y-%m-%d").to_numpy()
+    event_dates = np.sort(rng.choice(days, n_events))
+    event_venues = rng.integers(0, len(venue_df), n_events)
+    events = rng.integers(0, n_events, n_rows)
+    events.sort()
+
+    labels = (person_df["name1"] + "@" + person_df["group1"]).to_numpy()
+    popularity = 1 / np.arange(1, len(labels) + 1) ** 1.1
+    persons = rng.choice(
+        len(labels), size=(n_rows, max_shown), p=popularity / popularity.sum()
+    )
+    weights = np.array(N_SHOWN_WEIGHTS[:max_shown])
+    n_shown = rng.choice(np.arange(1, max_shown + 1), n_rows, p=weights / weights.sum())
+
+    data = {
+        "date": event_dates[events],
+        "location": venue_df["location"].to_numpy()[event_venues[events]],
+    }
+    for col in range(max_shown):
+        cells = np.full(n_rows, None, dtype=object)
+        shown = n_shown > col
+        cells[shown] = labels[persons[shown, col]]
+        data[f"name{col + 1}"] = cells
+
+    df = pd.DataFrame(data)
+    df.index = df.index + 1
+    return df
+
+
+def make_dataset(
+    n_rows: int, seed: int = 0
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    n_persons = int(np.clip(np.sqrt(n_rows) * 4, 20, 5_000))
+    n_venues = int(np.clip(np.sqrt(n_rows), 10, 2_000))
+    person_df = make_person_df(n_persons, max(n_persons // 6, 1), rng)
+    venue_df = make_venue_df(n_venues, rng)
+    cheki_df = make_cheki_df(n_rows, person_df, venue_df, rng)
+    return cheki_df, person_df, venue_df
+
+
+def to_sheet_values(df: pd.DataFrame, header: list[str] | None = None) -> list:
+    # Back to the raw worksheet grid (nulls as blank cells), for the fake
+    # gspread client.
+    header = header or [str(col) for col in df.columns]
+    return [header] + df.fillna("").astype(str).to_numpy().tolist()
@@ -1,116 +1,177 @@
 from datetime import date
+from functools import partial
+from typing import Callable
 
 import numpy as np
 import pandas as pd
 import streamlit as st
 
+import src.aggregates as aggregates
+import src.compute as compute
 import src.figures as figures
+import src.geo as geo
 import src.munge as munge
-from src.geo import get_map_layer
-
-
-def get_cheki_chart_data(df: pd.DataFrame) -> pd.DataFrame:
-    chart_data = df.copy()
-    chart_data["datetime"] = pd.to_datetime(chart_data["date"])
-    chart_data.set_index("datetime", inplace=True)
-    df_groupby = chart_data.groupby(pd.Grouper(freq="MS"))["name1"].count()
-    df_groupby.rename("count", inplace=True)
-    updated_df = df_groupby.to_frame()
-    return updated_df
-
-
-def limit_to_selected_persons(
-    selected_persons: list[str], df: pd.DataFrame
-) -> pd.DataFrame:
-    temp_dfs = []
-    name_cols = [col for col in df.columns if "name" in col]
-    for col in name_cols:
-        for person in selected_persons:
-            temp_dfs.append(df[df[col].str.contains(person)])
-    dated_cheki_df = pd.concat(temp_dfs)
-
-    dated_cheki_df = dated_cheki_df.replace("", np.nan)
-    dated_cheki_df = dated_cheki_df.dropna(how="all", axis=1)
-    dated_cheki_df = dated_cheki_df.replace(np.nan, "")
-    dated_cheki_df.sort_values("date", inplace=True)
-    return dated_cheki_df
-
-
-def get_cheki_map_data(df: pd.DataFrame) -> pd.DataFrame:
-    grouped = df.groupby("location")["date"].count()
-    map_df = grouped.reset_index()
-    map_df.rename(columns={"date": "count"}, inplace=True)
-    cheki_map_df = pd.merge(
-        map_df,
-        df[["location", "latitude", "longitude", "full_address"]],
-        how="inner",
-        on="location",
+import src.search as search
+import src.thumbnails as thumbnails
+from src.instrumentation import span, to_json_lines
+from src.pipeline import ChekiData
+
+GALLERY_PAGE_SIZE = 24
+GALLERY_COLUMNS = 4
+DATA_PAGE_SIZES = [50, 100, 250, 500]
+
+
+# Unlike st.tabs, which runs every tab body on each rerun, only the selected
+# view is computed and sent to the browser.
+def select_view(options: list[str], key: str, index: int = 0) -> str:
+    view = st.radio(
+        key,
+        options,
+        index=index,
+        horizontal=True,
+        label_visibility="collapsed",
+        key=key,
+    )
+    return view or options[index]
+
+
+def get_debug_sidebar(spans: list[dict]) -> None:
+    with st.sidebar:
+        st.subheader("Stage timings")
+        st.dataframe(pd.DataFrame(spans), hide_index=True)
+        st.download_button(
+            "Export JSON lines",
+            to_json_lines(spans),
+            file_name="timings.jsonl",
+            mime="application/jsonl",
+        )
+
+
+# The frame stays on the server: it is sorted and projected here and only the
+# page on screen is sent to the browser, so the payload doesn't grow with the
+# collection. `get_page(start, size, sort_by, ascending, columns)` cuts it.
+def get_data_view(
+    columns: list[str], n_rows: int, get_page: Callable[..., pd.DataFrame]
+) -> None:
+    sort_options: list[str | None] = [None, *columns]
+    col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+    with col1:
+        shown_columns = st.multiselect("Columns", columns, default=columns)
+    with col2:
+        sort_by = st.selectbox(
+            "Sort by",
+            sort_options,
+            format_func=lambda col: "(default order)" if col is None else col,
+        )
+        descending = st.checkbox("Descending")
+    with col3:
+        page_size = st.selectbox("Rows per page", DATA_PAGE_SIZES)
+    n_pages = max(-(-n_rows // page_size), 1)
+    with col4:
+        page = st.number_input(
+            f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1, step=1
+        )
+
+    start = (int(page) - 1) * page_size
+    with span("get_page", rows_in=n_rows) as s:
+        page_df = get_page(
+            start, page_size, sort_by, not descending, shown_columns or columns
+        )
+        s.rows_out = len(page_df)
+    st.dataframe(page_df, 800, 800)
+    st.caption(f"Rows {min(start + 1, n_rows)}-{start + len(page_df)} of {n_rows}")
+
+
+def get_dates(data: ChekiData) -> tuple[date, date]:
+    earliest_date, today = compute.get_date_bounds(data)
+    first_date = earliest_date
+    last_date = today
+
+    date_selector = st.date_input(
+        "Select date range",
+        value=[earliest_date, today],
+        min_value=earliest_date,
+        max_value=today,
     )
-    # df = df[["location", "latitude", "longitude", "full_address"]]
-    cheki_map_df = cheki_map_df.replace("", np.nan)
-    cheki_map_df = cheki_map_df.dropna(axis=0, how="any")
-    cheki_map_df.drop_duplicates(inplace=True)
-    # df = df.reset_index(drop=True)
 
-    cheki_map_df["latitude"] = cheki_map_df["latitude"].astype(float)
-    cheki_map_df["longitude"] = cheki_map_df["longitude"].astype(float)
-    return cheki_map_df
+    if isinstance(date_selector, date):
+        return (date_selector, today)
+
+    if len(date_selector) == 0:
+        return first_date, last_date
+
+    if len(date_selector) >= 1:
+        first_date = date_selector[0]  # type: ignore
+
+    if len(date_selector) >= 2:
+        last_date = date_selector[1]  # type: ignore
+
+    return first_date, last_date
+
+
+def get_persons(data: ChekiData) -> list[str]:
+    # The query is matched against the name index here; the multiselect only
+    # holds the matches and the current selection, however large the roster.
+    query = st.text_input("Search for a name", key="name_query")
+    selected = st.session_state.get("selected_persons", [])
+    matches = search.search_names(data.name_index, query)
+    is_selected = set(selected)
+    options = selected + [name for name in matches if name not in is_selected]
+    selected = st.multiselect("Selected names", options, default=selected)
+    st.session_state["selected_persons"] = selected
+    return selected
 
 
 def get_cheki_tab(
+    data: ChekiData,
     first_date: date,
     last_date: date,
-    venue_df: pd.DataFrame,
     selected_persons: list[str],
-    dated_cheki_df: pd.DataFrame,
 ) -> None:
-    ranged_cheki_df = dated_cheki_df[
-        (dated_cheki_df.date >= pd.to_datetime(first_date))
-        & (dated_cheki_df.date <= pd.to_datetime(last_date))
-    ]
-    ranged_cheki_df["date"] = ranged_cheki_df["date"].dt.strftime("%Y-%m-%d")
-    merged_cheki_data = pd.merge(
-        dated_cheki_df,
-        venue_df,
-        how="left",
-        left_on="location",
-        right_on="location",
-    )
+    view = select_view(["🗺️ Map", "📈 Chart", "🗃 Data", "🖼️ Gallery"], key="cheki_view")
 
-    if selected_persons:
-        merged_cheki_data = limit_to_selected_persons(
-            selected_persons, merged_cheki_data
+    if view == "🗃 Data":
+        ranged_cheki_df = compute.get_cheki_rows(
+            data, first_date, last_date, selected_persons
+        )
+        get_data_view(
+            compute.get_cheki_columns(data, ranged_cheki_df),
+            len(ranged_cheki_df),
+            partial(compute.get_cheki_page, data, ranged_cheki_df),
         )
 
-    map_tab, chart_tab, data_tab = st.tabs(["🗺️ Map", "📈 Chart", "🗃 Data"])
-
-    with data_tab:
-        st.dataframe(merged_cheki_data, 800, 800)
-
-    with chart_tab:
-        cheki_chart_data = get_cheki_chart_data(merged_cheki_data)
+    elif view == "📈 Chart":
+        granularities = list(aggregates.GRANULARITIES)
+        granularity = select_view(
+            granularities, key="granularity", index=granularities.index("Month")
+        )
+        freq = aggregates.GRANULARITIES[granularity]
+        cheki_chart_data = compute.get_time_series(
+            data, first_date, last_date, selected_persons, freq
+        )
         fig = figures.get_cheki_bar_fig(cheki_chart_data)
         st.plotly_chart(fig)
 
-    with map_tab:
-        merged_cheki_data.copy()
-        cheki_map_df = get_cheki_map_data(merged_cheki_data)
-
-        (
-            heat_tab,
-            column_tab,
-            scatter_tab,
-        ) = st.tabs(["🔥Heatmap", "🏢Column", "⭕Scatter"])
-
-        with heat_tab:
-            deck = get_map_layer(df=cheki_map_df, map_type="heat")
-            st.pydeck_chart(deck)
-        with column_tab:
-            deck = get_map_layer(df=cheki_map_df, map_type="column")
-            st.pydeck_chart(deck)
-        with scatter_tab:
-            deck = get_map_layer(df=cheki_map_df, map_type="scatter")
-            st.pydeck_chart(deck)
+    elif view == "🖼️ Gallery":
+        get_gallery(data, first_date, last_date, selected_persons)
+
+    else:
+        cheki_map_df = compute.get_venue_counts(
+            data, first_date, last_date, selected_persons
+        )
+        zoom = st.slider("Map zoom", min_value=4, max_value=15, value=geo.DEFAULT_ZOOM)
+        with span("get_map_cells", rows_in=len(cheki_map_df), cached=True) as s:
+            pyramid = geo.get_grid_pyramid(cheki_map_df)
+            map_cells = geo.get_map_cells(cheki_map_df, pyramid, zoom)
+            s.rows_out = len(map_cells)
+
+        map_types = {"🔥Heatmap": "heat", "🏢Column": "column", "⭕Scatter": "scatter"}
+        map_view = select_view(list(map_types), key="map_view")
+        with span("get_map_layer", rows_in=len(map_cells)):
+            deck = geo.get_map_layer(
+                df=map_cells, map_type=map_types[map_view], zoom=zoom
+            )
+        st.pydeck_chart(deck)
 
         st.dataframe(cheki_map_df, use_container_width=True)
         st.write(
@@ -118,33 +179,61 @@ def get_cheki_tab(
         )
 
 
+def get_gallery(
+    data: ChekiData,
+    first_date: date,
+    last_date: date,
+    selected_persons: list[str],
+) -> None:
+    gallery_df = compute.get_gallery_rows(data, first_date, last_date, selected_persons)
+    if gallery_df.empty:
+        st.info(f"No cheki in this selection has a `{compute.IMAGE_COLUMN}`.")
+        return
+
+    # Only the thumbnails of the page on screen are decoded or read.
+    n_pages = -(-len(gallery_df) // GALLERY_PAGE_SIZE)
+    page = st.number_input(
+        f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1, step=1
+    )
+    start = (int(page) - 1) * GALLERY_PAGE_SIZE
+    page_df = gallery_df.iloc[start : start + GALLERY_PAGE_SIZE]
+    with span("get_thumbnails", rows_in=len(page_df)) as s:
+        page_thumbnails = thumbnails.get_thumbnails(list(page_df[compute.IMAGE_COLUMN]))
+        s.rows_out = sum(thumbnail is not None for thumbnail in page_thumbnails)
+
+    columns = st.columns(GALLERY_COLUMNS)
+    captions = [
+        f"{cheki_date:%Y-%m-%d} {location}" if pd.notna(cheki_date) else location
+        for cheki_date, location in zip(page_df["date"], page_df["location"])
+    ]
+    for i, (thumbnail, caption) in enumerate(zip(page_thumbnails, captions)):
+        with columns[i % GALLERY_COLUMNS]:
+            if thumbnail is None:
+                st.caption(f"Image not found: {caption}")
+            else:
+                st.image(str(thumbnail), caption=caption)
+
+
 def get_name_tab(
-    names_df: pd.DataFrame, person_df: pd.DataFrame, selected_persons: list[str]
+    data: ChekiData,
+    first_date: date,
+    last_date: date,
+    selected_persons: list[str],
 ) -> None:
     also_group_by_date = st.checkbox("Also group by date?", value=False)
-    if also_group_by_date:
-        groupby_select = ["date", "name"]
-        sort_level = 2
-    else:
-        groupby_select = ["name"]
-        sort_level = 1
-    name_df = munge.get_records_df(
-        names_df=names_df,
-        person_df=person_df,
-        groupby_select=groupby_select,
-        sort_level=sort_level,
+    name_df = compute.get_name_totals(
+        data, first_date, last_date, selected_persons, also_group_by_date
     )
 
     name_df.columns = pd.Index([str(col) for col in name_df.columns])
-    if selected_persons:
-        name_df = name_df[name_df["name"].isin(selected_persons)]
+    view = select_view(["📈 Chart", "🗃 Data"], key="name_view")
 
-    chart_tab, data_tab = st.tabs(["📈 Chart", "🗃 Data"])
-
-    with data_tab:
-        st.dataframe(name_df, 800, 800)
+    if view == "🗃 Data":
+        get_data_view(
+            list(name_df.columns), len(name_df), partial(compute.get_page, name_df)
+        )
 
-    with chart_tab:
+    else:
         max_value = name_df["total"].max()
         if max_value is not np.nan:
             max_value = int(name_df["total"].max())
@@ -162,7 +251,9 @@ def get_name_tab(
                     value=cutoff_value,
                 )
                 if cutoff > 0:
-                    name_df = munge.get_cutoff_data(name_df, int(cutoff))
+                    with span("get_cutoff_data", rows_in=len(name_df)) as s:
+                        name_df = munge.get_cutoff_data(name_df, int(cutoff))
+                        s.rows_out = len(name_df)
             with col2:
                 value = len(name_df)
                 if len(name_df) > 100:
@@ -176,16 +267,18 @@ def get_name_tab(
                 )
 
             if isinstance(top_n, int):
-                name_df = name_df.head(top_n)
+                with span("get_top_n_data", rows_in=len(name_df)) as s:
+                    name_df = munge.get_top_n_data(name_df, top_n)
+                    s.rows_out = len(name_df)
 
-            treemap_tab, bar_tab, pie_tab = st.tabs(["🌳treemap", "📊bar", "🥧pie"])
-            with treemap_tab:
+            fig_view = select_view(["🌳treemap", "📊bar", "🥧pie"], key="fig_view")
+            if fig_view == "🌳treemap":
                 use_groups = st.checkbox(label="Use Groups")
                 fig = figures.get_treemap_fig(name_df, use_groups=use_groups)
                 st.plotly_chart(fig, use_container_width=True)
-            with bar_tab:
+            elif fig_view == "📊bar":
                 fig = figures.get_bar_fig(name_df)
                 st.plotly_chart(fig)
-            with pie_tab:
+            else:
                 fig = figures.get_pie_fig(name_df)
                 st.plotly_chart(fig)
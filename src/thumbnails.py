@@ -0,0 +1,138 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+from urllib.request import url2pathname
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from src.snapshots import SNAPSHOT_DIR
+
+# Fixed-size JPEG thumbnails of the cheki scans, kept in a disk cache keyed by
+# the hash of the image file, so a moved or renamed file is not decoded again
+# and an edited one is. Misses are decoded in a small thread pool (Pillow
+# releases the GIL while decoding); JPEGs are decoded at reduced scale, so a
+# large scan never sits in memory at full resolution. The cache size is kept
+# in-process (measured once, then grown by every thumbnail written), and the
+# least recently used thumbnails are deleted once it passes its limit.
+THUMBNAIL_DIR = Path(
+    os.environ.get("CHEKILYTICS_THUMBNAIL_DIR", SNAPSHOT_DIR / "thumbnails")
+)
+THUMBNAIL_SIZE = (240, 320)
+CACHE_LIMIT = int(os.environ.get("CHEKILYTICS_THUMBNAIL_CACHE_MB", "256")) * 2**20
+MAX_WORKERS = 4
+JPEG_QUALITY = 85
+HASH_CHUNK = 2**20
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="thumb")
+# (path, size, mtime) -> content hash, so unchanged files are only read once.
+_hashes: dict[tuple[str, int, int], str] = {}
+_evict_lock = threading.Lock()
+_size_lock = threading.Lock()
+# Bytes in the cache directory; None until the first eviction measures it.
+_cache_bytes: int | None = None
+
+
+def uri_to_path(uri: str) -> Path | None:
+    # Only local files: file:// URIs and plain paths.
+    parts = urlsplit(uri)
+    if parts.scheme == "file":
+        return Path(url2pathname(unquote(parts.path)))
+    if parts.scheme == "" or len(parts.scheme) == 1:  # a Windows drive letter
+        return Path(uri)
+    return None
+
+
+def get_content_hash(path: Path) -> str:
+    stat = path.stat()
+    key = (str(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _hashes:
+        digest = hashlib.blake2b(digest_size=16)
+        with path.open("rb") as f:
+            while chunk := f.read(HASH_CHUNK):
+                digest.update(chunk)
+        _hashes[key] = digest.hexdigest()
+    return _hashes[key]
+
+
+def get_thumbnail_path(content_hash: str) -> Path:
+    width, height = THUMBNAIL_SIZE
+    return THUMBNAIL_DIR / content_hash[:2] / f"{content_hash}_{width}x{height}.jpg"
+
+
+def add_cache_bytes(size: int) -> None:
+    global _cache_bytes
+    with _size_lock:
+        if _cache_bytes is not None:
+            _cache_bytes += size
+
+
+def needs_eviction(limit: int = CACHE_LIMIT) -> bool:
+    with _size_lock:
+        return _cache_bytes is None or _cache_bytes > limit
+
+
+def make_thumbnail(source: Path, dest: Path) -> None:
+    with Image.open(source) as image:
+        # Lets the JPEG decoder scale down by up to 8x while decoding.
+        image.draft("RGB", THUMBNAIL_SIZE)
+        thumbnail = ImageOps.exif_transpose(image)
+        thumbnail.thumbnail(THUMBNAIL_SIZE)
+        thumbnail = thumbnail.convert("RGB")
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest.with_suffix(f".{threading.get_ident()}.tmp")
+    thumbnail.save(tmp_path, "JPEG", quality=JPEG_QUALITY)
+    tmp_path.replace(dest)
+    add_cache_bytes(dest.stat().st_size)
+
+
+def get_thumbnail(uri: str) -> Path | None:
+    source = uri_to_path(uri)
+    try:
+        if source is None or not source.is_file():
+            return None
+        dest = get_thumbnail_path(get_content_hash(source))
+        if dest.exists():
+            # The modification time doubles as the last use, for eviction.
+            dest.touch()
+        else:
+            make_thumbnail(source, dest)
+        return dest
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+        return None
+
+
+def evict_thumbnails(limit: int = CACHE_LIMIT) -> int:
+    global _cache_bytes
+    with _evict_lock:
+        files = []
+        for path in THUMBNAIL_DIR.glob("*/*.jpg"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= limit:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        with _size_lock:
+            _cache_bytes = total
+        return removed
+
+
+def get_thumbnails(uris: list[str]) -> list[Path | None]:
+    # One page at a time; thumbnails come back in the order of `uris`. The
+    # directory is only scanned when the cache is over its limit (or not yet
+    # measured); the page's thumbnails are the most recently used, so
+    # eviction spares them.
+    thumbnails = list(_executor.map(get_thumbnail, uris))
+    if needs_eviction():
+        _executor.submit(evict_thumbnails)
+    return thumbnails
@@ -0,0 +1,155 @@
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+import pandas as pd
+from pydantic import TypeAdapter, ValidationError
+from pydantic_core import ErrorDetails
+
+from src.models import ChekiRow, Person
+from src.venues import VENUE_ADAPTER, get_venue_records
+
+# Loader frames are validated against src.models in bulk, one TypeAdapter call
+# per chunk of rows; only a chunk's records and model instances are alive at a
+# time, so a full load doesn't hold a second copy of the sheet as objects. Row
+# content hashes are kept across refreshes (process-wide, like the figure
+# cache) so only new or edited rows go through pydantic again.
+
+CHEKI_ADAPTER = TypeAdapter(list[ChekiRow])
+PERSON_ADAPTER = TypeAdapter(list[Person])
+ERROR_COLUMNS = ["sheet", "row", "field", "message"]
+CHUNK_ROWS = 20_000
+
+
+def get_cheki_records(cheki_df: pd.DataFrame) -> list[dict]:
+    name_cols = [col for col in cheki_df.columns if col.startswith("name")]
+    dates = pd.to_datetime(cheki_df["date"], errors="coerce")
+    names = zip(*(cheki_df[col] for col in name_cols))
+    return [
+        {
+            "cheki_id": cheki_id,
+            # Unparseable dates are passed through for pydantic to report.
+            "date": parsed.date() if not pd.isna(parsed) else raw or None,
+            "location": location or "",
+            "names": [name for name in row_names if name],
+        }
+        for cheki_id, raw, parsed, location, row_names in zip(
+            cheki_df.index, cheki_df["date"], dates, cheki_df["location"], names
+        )
+    ]
+
+
+def get_person_records(person_df: pd.DataFrame) -> list[dict]:
+    return [
+        {
+            "person_id": name,
+            "title": name,
+            "name": name,
+            "characters": [
+                {
+                    "character_id": name,
+                    "title": name,
+                    "name": name,
+                    "act": group or None,
+                }
+            ],
+        }
+        for name, group in zip(person_df["name1"].fillna(""), person_df["group1"])
+    ]
+
+
+def validate_records(
+    adapter: TypeAdapter, records: list[dict]
+) -> dict[int, list[ErrorDetails]]:
+    # A list adapter reports every failing item, not just the first. The
+    # model instances themselves aren't kept, only the errors.
+    try:
+        adapter.validate_python(records)
+    except ValidationError as e:
+        errors: defaultdict[int, list[ErrorDetails]] = defaultdict(list)
+        for error in e.errors(include_url=False):
+            # A list adapter's first location is the item's position.
+            errors[int(error["loc"][0])].append(error)
+        return dict(errors)
+    return {}
+
+
+@dataclass
+class RowValidator:
+    sheet: str
+    adapter: TypeAdapter
+    to_records: Callable[[pd.DataFrame], list[dict]]
+    hashes: pd.Series = field(default_factory=lambda: pd.Series(dtype="uint64"))
+    errors: dict[Any, list[tuple[str, str]]] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def get_changed_rows(self, hashes: pd.Series) -> pd.Index:
+        common = hashes.index.intersection(self.hashes.index)
+        same = hashes[common].to_numpy() == self.hashes[common].to_numpy()
+        return hashes.index.difference(common[same], sort=False)
+
+    def validate(self, df: pd.DataFrame, hashes: pd.Series | None = None) -> pd.Index:
+        if hashes is None:
+            hashes = pd.util.hash_pandas_object(df, index=False)
+        with self.lock:
+            changed = self.get_changed_rows(hashes)
+            # Errors of unchanged rows carry over; removed rows drop out.
+            errors = {
+                row: row_errors
+                for row, row_errors in self.errors.items()
+                if row in hashes.index and row not in changed
+            }
+            for start in range(0, len(changed), CHUNK_ROWS):
+                rows = changed[start : start + CHUNK_ROWS]
+                chunk_errors = validate_records(
+                    self.adapter, self.to_records(df.loc[rows])
+                )
+                errors |= {
+                    rows[i]: [
+                        (".".join(str(part) for part in error["loc"][1:]), error["msg"])
+                        for error in row_errors
+                    ]
+                    for i, row_errors in chunk_errors.items()
+                }
+            self.errors = errors
+            self.hashes = hashes
+        return changed
+
+    def get_errors(self) -> pd.DataFrame:
+        with self.lock:
+            return pd.DataFrame(
+                [
+                    (self.sheet, row, field_name, message)
+                    for row, row_errors in self.errors.items()
+                    for field_name, message in row_errors
+                ],
+                columns=ERROR_COLUMNS,
+            )
+
+
+VALIDATORS = {
+    "cheki": RowValidator("cheki", CHEKI_ADAPTER, get_cheki_records),
+    "person": RowValidator("person", PERSON_ADAPTER, get_person_records),
+    "venue": RowValidator("venue", VENUE_ADAPTER, get_venue_records),
+}
+
+
+def validate_sheets(
+    frames: dict[str, pd.DataFrame], hashes: dict[str, pd.Series] | None = None
+) -> pd.DataFrame:
+    # Row hashes already computed for a sheet (the cheki sheet's, for the
+    # incremental update) are reused rather than hashed again.
+    hashes = hashes or {}
+    for sheet, df in frames.items():
+        VALIDATORS[sheet].validate(df, hashes.get(sheet))
+    return pd.concat(
+        [VALIDATORS[sheet].get_errors() for sheet in frames], ignore_index=True
+    )
+
+
+def clear_validators() -> None:
+    for validator in VALIDATORS.values():
+        with validator.lock:
+            validator.hashes = pd.Series(dtype="uint64")
+            validator.errors = {}
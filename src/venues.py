@@ -0,0 +1,50 @@
+import pandas as pd
+from pydantic import TypeAdapter, ValidationError
+
+from src.models import Venue
+
+VENUE_ADAPTER = TypeAdapter(list[Venue])
+OPTIONAL_FIELDS = [
+    "postal_code",
+    "country",
+    "subdivision",
+    "municipality",
+    "neighborhood",
+]
+
+
+def get_venue_records(venue_df: pd.DataFrame) -> list[dict]:
+    return [
+        {
+            # Blank (null) cells of required fields validate as "", as before.
+            "venue_id": row["location"] or "",
+            "title": row["location"] or "",
+            "latitude": row["latitude"] or "",
+            "longitude": row["longitude"] or "",
+            "full_address": row["full_address"] or "",
+        }
+        | {field: row.get(field) or None for field in OPTIONAL_FIELDS}
+        for row in venue_df.to_dict("records")
+    ]
+
+
+# One row per location with parsed coordinates, built once per data load from
+# the venue sheet. Rows without a location, address or usable coordinates, or
+# that fail models.Venue validation, are left out.
+def build_venue_table(venue_df: pd.DataFrame) -> pd.DataFrame:
+    df = venue_df[["location", "latitude", "longitude", "full_address"]]
+    df = df.dropna(subset=["location", "full_address"])
+    df = df.drop_duplicates(subset="location")
+    df = df.assign(
+        latitude=pd.to_numeric(df["latitude"], errors="coerce"),
+        longitude=pd.to_numeric(df["longitude"], errors="coerce"),
+    ).dropna(subset=["latitude", "longitude"])
+
+    records = get_venue_records(venue_df.loc[df.index])
+    try:
+        VENUE_ADAPTER.validate_python(records)
+    except ValidationError as e:
+        invalid = {error["loc"][0] for error in e.errors()}
+        df = df[[i not in invalid for i in range(len(df))]]
+
+    return df.set_index("location")
@@ -1,54 +1,87 @@
-import numpy as np
+import os
+
 import streamlit as st
 
-import src.munge as munge
-from src.loaders import get_datetime_cols, get_worksheet, get_worksheet_location
-from src.tabs import get_cheki_tab, get_name_tab
+import src.instrumentation as instrumentation
+from src.figures import get_figure_cache_info
+from src.instrumentation import span
+from src.loaders import get_data_service
+from src.tabs import (
+    get_cheki_tab,
+    get_dates,
+    get_debug_sidebar,
+    get_name_tab,
+    get_persons,
+    select_view,
+)
 
+# Set to a path to append every rerun's stage timings there as JSON lines.
+TRACE_FILE = os.environ.get("CHEKILYTICS_TRACE_FILE")
 
-def main():
+
+def run_dashboard():
     sheet_url = st.secrets["private_gsheets_url"]
-    cheki_df = get_worksheet(sheet_url, 0)
-    dated_cheki_df = get_datetime_cols(cheki_df)
-    names_df = munge.group_cheki_by_name(dated_cheki_df)
-    person_df = get_worksheet(sheet_url, 1)
-    venue_df = get_worksheet_location(sheet_url, 3)
+    data_service = get_data_service(sheet_url)
+    with span("load_cheki_data", cached=True):
+        data = data_service.get()
 
     col1, col2 = st.columns(2)
 
     with col1:
-        date_range = munge.get_dates(names_df)
+        date_range = get_dates(data)
         st.write(f"Selected dates are {date_range[0]} - {date_range[1]}")
 
     with col2:
-        all_persons = munge.get_all_names(person_df)
-        selected_persons = st.multiselect(
-            "Search for a name", np.insert(all_persons, 0, "")
-        )
+        selected_persons = get_persons(data)
         if selected_persons:
             st.write(f"Selected {selected_persons}")
         else:
             st.write("No names selected.")
 
-    names_df = names_df[names_df.date.between(date_range[0], date_range[1])]
-
-    name_tab, cheki_tab = st.tabs(["💃name", "🎴cheki"])
+    view = select_view(["💃name", "🎴cheki"], key="main_view")
 
-    with name_tab:
+    if view == "💃name":
         get_name_tab(
-            names_df=names_df, person_df=person_df, selected_persons=selected_persons
+            data=data,
+            first_date=date_range[0],
+            last_date=date_range[1],
+            selected_persons=selected_persons,
         )
 
-    with cheki_tab:
+    else:
         get_cheki_tab(
+            data=data,
             first_date=date_range[0],
             last_date=date_range[1],
-            venue_df=venue_df,
             selected_persons=selected_persons,
-            dated_cheki_df=dated_cheki_df,
         )
 
-    st.write(f"Total values: {len(dated_cheki_df)}")
+    st.write(f"Total values: {len(data.cheki_df)}")
+    with st.expander("Memory usage"):
+        st.dataframe(data.memory_report)
+    with st.expander(f"Validation errors ({len(data.validation_errors)})"):
+        st.dataframe(data.validation_errors, hide_index=True)
+    with st.expander("Figure cache"):
+        st.write(get_figure_cache_info())
+    with st.expander("Data refresh"):
+        st.write(data_service.get_info())
+
+
+def main():
+    show_timings = st.sidebar.checkbox("Debug timings")
+    if show_timings or TRACE_FILE:
+        instrumentation.start_recording()
+    try:
+        with span("rerun"):
+            run_dashboard()
+    finally:
+        if instrumentation.is_recording():
+            spans = instrumentation.stop_recording()
+            if TRACE_FILE:
+                with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                    f.write(instrumentation.to_json_lines(spans))
+            if show_timings:
+                get_debug_sidebar(spans)
 
 
 if __name__ == "__main__":
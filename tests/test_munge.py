@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.munge import (
+    get_cutoff_data,
+    get_top_n_data,
+    group_cheki_by_name,
+    split_name_group,
+)
+from src.sheets import get_datetime_cols
+from src.synthetic import make_dataset
+
+
+# The original row-by-row implementation, kept as the reference the
+# vectorized group_cheki_by_name must reproduce.
+def group_cheki_by_name_reference(df: pd.DataFrame) -> pd.DataFrame:
+    name_cols = [col for col in df.columns if "name" in col]
+    chekis = []
+    for idx, row in df.iterrows():
+        name_count = len(list(filter(None, row[name_cols].values)))
+        for col in df.columns:
+            if (row[col] is not np.nan) and ("name" in col) and (row[col]):
+                chekis.append(
+                    {
+                        "cheki_id": idx,
+                        "date": row["date"].date(),
+                        "person": row[col],
+                        "location": row["location"],
+                        "year": row["date"].year,
+                        "month": row["date"].month,
+                        "name": split_name_group(row[col])[0],
+                        "group": split_name_group(row[col])[1],
+                        "n_shown": name_count,
+                    }
+                )
+    return pd.DataFrame(chekis)
+
+
+def assert_same_as_reference(cheki_df: pd.DataFrame) -> None:
+    df = get_datetime_cols(cheki_df)
+    pd.testing.assert_frame_equal(
+        group_cheki_by_name(df), group_cheki_by_name_reference(df)
+    )
+
+
+def test_group_cheki_by_name_matches_reference_on_synthetic_data():
+    cheki_df, _, _ = make_dataset(2_000, seed=1)
+    assert_same_as_reference(cheki_df)
+
+
+def test_group_cheki_by_name_matches_reference_on_edge_cases():
+    # Blank cells arrive as nulls (see dtypes.nullify_empty_strings); a blank
+    # date is kept with NaN year and month.
+    cheki_df = pd.DataFrame(
+        {
+            "date": ["2023-01-02", "2023-01-01", "2023-02-03", "2023-03-04", None],
+            "location": ["Venue A", None, "Venue B", "Venue A", "Venue B"],
+            "name1": [
+                "天使 さな@グループ",
+                "  楠木  りほ ",
+                None,
+                "雅　みき @ 組 X ",
+                "Juri",
+            ],
+            "name2": [None, "天使さな@グループ", None, "Juri", None],
+            "name3": ["Juri@  Solo  Act", None, None, None, None],
+        },
+        index=[1, 2, 3, 4, 5],
+    )
+    assert_same_as_reference(cheki_df)
+
+
+@pytest.mark.parametrize(
+    "person, expected",
+    [
+        ("天使 さな@グループ", ["天使 さな", "グループ"]),
+        ("  楠木  りほ ", ["楠木 りほ", "楠木 りほ"]),
+        ("雅　みき @ 組 X ", ["雅 みき", "組 X"]),
+    ],
+)
+def test_group_cheki_by_name_splits_name_and_group(person, expected):
+    df = get_datetime_cols(
+        pd.DataFrame({"date": ["2023-01-01"], "location": ["A"], "name1": [person]})
+    )
+    names_df = group_cheki_by_name(df)
+    assert names_df[["name", "group"]].iloc[0].tolist() == expected
+
+
+def test_others_row_sums_the_counts_as_ints():
+    df = pd.DataFrame(
+        {
+            "name": ["a", "b", "c", "d"],
+            "total": [5, 3, 2, 1],
+            "1": [4, 2, 2, 1],
+            "2": [1, 1, 0, 0],
+            "group": ["w", "x", "y", "z"],
+        }
+    )
+    for others_df in [get_top_n_data(df, 2), get_cutoff_data(df, 3)]:
+        assert others_df.iloc[-1].tolist() == ["OTHERS", 3, 3, 0, "OTHERS"]
+        assert (others_df[["total", "1", "2"]].dtypes == "int64").all()
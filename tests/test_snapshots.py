@@ -0,0 +1,47 @@
+import pytest
+
+import src.snapshots as snapshots
+from src.fake_gspread import FakeClient
+from src.sheets import get_all_worksheets
+
+URL = "https://docs.google.com/spreadsheets/d/fake-test/edit"
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, "SNAPSHOT_DIR", tmp_path)
+    return FakeClient(
+        {
+            "cheki": [
+                ["Date", "Location", "Name1"],
+                ["2023-01-01", "Venue A", "天使 さな"],
+                ["2023-01-02", "Venue B", "楠木 りほ"],
+            ],
+            "person": [["name1", "group1"], ["天使 さな", "グループ"]],
+            "unused": [],
+            "venue": [["Location", "Full Address"], ["Venue A", "東京都 1-1"]],
+        }
+    )
+
+
+def test_unchanged_revision_is_served_from_the_snapshot(client):
+    get_all_worksheets(client, URL)
+    requests = client.requests
+    cheki_df, _, _ = get_all_worksheets(client, URL)
+    # Only the revision is looked up.
+    assert client.requests == requests + 1
+    assert cheki_df["name1"].tolist() == ["天使 さな", "楠木 りほ"]
+
+
+def test_edit_above_the_last_row_is_picked_up(client):
+    get_all_worksheets(client, URL)
+    cheki = client.spreadsheet.worksheets()[0]
+    cheki.values[1][2] = "雅 みき"
+    cheki.values.append(["2023-01-03", "Venue A", ""])
+    client.spreadsheet.touch()
+
+    cheki_df, _, _ = get_all_worksheets(client, URL)
+    assert cheki_df["name1"].tolist() == ["雅 みき", "楠木 りほ", None]
+    # And the snapshot written for the new revision has the edit too.
+    cheki_df, _, _ = get_all_worksheets(None, URL)
+    assert cheki_df["name1"].iloc[0] == "雅 みき"
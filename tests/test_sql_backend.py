@@ -0,0 +1,134 @@
+import gc
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import src.compute as compute
+import src.cube as cube
+import src.sql_backend as sql_backend
+from src.data_service import get_session_view
+from src.pipeline import ChekiData, process_cheki_data
+from src.search import get_spellings
+from src.synthetic import make_dataset
+
+
+@pytest.fixture
+def database_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(sql_backend, "DATABASE_DIR", tmp_path)
+    return tmp_path
+
+
+def build(n_rows: int) -> sql_backend.AnalyticsDatabase:
+    data = process_cheki_data(*make_dataset(n_rows, seed=1))
+    database = sql_backend.build_database(
+        data.cheki_df, data.names_df, data.venue_table
+    )
+    assert database is not None
+    return database
+
+
+def query(database: sql_backend.AnalyticsDatabase) -> int:
+    return len(
+        sql_backend.get_cheki_map_data(database, date(2000, 1, 1), date(2100, 1, 1), [])
+    )
+
+
+def test_earlier_database_stays_usable_after_a_rebuild(database_dir):
+    old = build(200)
+    new = build(300)
+    assert old.path != new.path
+    assert query(old) > 0
+    assert query(new) > 0
+
+
+def test_unchanged_data_shares_the_database(database_dir):
+    database = build(200)
+    assert build(200) is database
+    assert list(database_dir.glob("*.sqlite")) == [database.path]
+
+
+def test_database_is_removed_once_released(database_dir):
+    database = build(200)
+    path = database.path
+    del database
+    gc.collect()
+    assert not path.exists()
+
+
+def test_other_processes_databases_are_kept(database_dir, monkeypatch):
+    monkeypatch.setattr(sql_backend, "is_running", lambda pid: pid == 1)
+    live = database_dir / "analytics-1-0-abc.sqlite"
+    dead = database_dir / "analytics-999999-0-abc.sqlite"
+    for path in [live, dead]:
+        path.touch()
+    database = build(200)
+    assert live.exists()
+    assert not dead.exists()
+    assert database.path.exists()
+
+
+def test_session_view_keeps_the_database(database_dir, monkeypatch):
+    monkeypatch.setattr(sql_backend, "ENABLED", True)
+    data = process_cheki_data(*make_dataset(200, seed=1))
+    view = get_session_view(data)
+    del data
+    gc.collect()
+    assert view.analytics_db is not None
+    assert query(view.analytics_db) > 0
+
+
+# The SQL queries stand in for the cube and pandas paths and must give the
+# same frames.
+FIRST_DATE, LAST_DATE = date(2019, 3, 1), date(2024, 10, 31)
+
+
+@pytest.fixture
+def data(database_dir, monkeypatch) -> ChekiData:
+    monkeypatch.setattr(sql_backend, "ENABLED", True)
+    data = process_cheki_data(*make_dataset(2_000, seed=1))
+    assert data.analytics_db is not None
+    return data
+
+
+def get_persons(data: ChekiData) -> list[str]:
+    persons = list(data.person_df["name1"].astype(object).head(3))
+    return get_spellings(data.name_index, persons)
+
+
+@pytest.mark.parametrize("group_by_date", [False, True])
+def test_records_match_the_cube(data, group_by_date):
+    assert data.analytics_db is not None
+    pd.testing.assert_frame_equal(
+        sql_backend.get_records_df(
+            data.analytics_db, data.person_df, FIRST_DATE, LAST_DATE, group_by_date
+        ),
+        cube.get_records_df(
+            data.count_cube, data.person_df, FIRST_DATE, LAST_DATE, group_by_date
+        ),
+    )
+
+
+@pytest.mark.parametrize("freq", ["MS", "W-MON"])
+def test_chart_data_matches_pandas(data, freq):
+    assert data.analytics_db is not None
+    persons = get_persons(data)
+    rows = compute.get_cheki_rows(data, FIRST_DATE, LAST_DATE, persons)
+    pd.testing.assert_frame_equal(
+        sql_backend.get_cheki_chart_data(
+            data.analytics_db, FIRST_DATE, LAST_DATE, persons, freq
+        ),
+        compute.get_cheki_chart_data(rows, freq),
+    )
+
+
+def test_map_data_matches_pandas(data):
+    assert data.analytics_db is not None
+    persons = get_persons(data)
+    rows = compute.get_cheki_rows(data, FIRST_DATE, LAST_DATE, persons)
+    pd.testing.assert_frame_equal(
+        sql_backend.get_cheki_map_data(
+            data.analytics_db, FIRST_DATE, LAST_DATE, persons
+        ),
+        compute.get_cheki_map_data(rows, data.venue_table),
+    )